@@ -1,29 +1,83 @@
-from db import connect
-from dining_hall import DiningHall, Menu
-
-# Constants for dining hall info
-SOUTH = "South"
-YAHENTAMITSI = "Yahentamitsi"
-TWO_FIFTY_ONE = "251"
-HALLS = {SOUTH: 16, YAHENTAMITSI: 19, TWO_FIFTY_ONE: 51}
+from datetime import date
+from db import CONNECTION_METRICS, connect, release
+from archive import archive_pages
+from halls import load_halls
+from page_cache import load_page_cache, save_page_cache
+from pipeline import stream_menu
+from prefetch import PREFETCH_DAYS, prefetch_menus, write_menus
 
 
 def main(args):
-    the_y = DiningHall(name=YAHENTAMITSI, location_num=HALLS[YAHENTAMITSI])
-    south = DiningHall(name=SOUTH, location_num=HALLS[SOUTH])
-    two_fifty_one = DiningHall(name=TWO_FIFTY_ONE, location_num=HALLS[TWO_FIFTY_ONE])
+    conn = connect()
+    connection_metrics = dict(CONNECTION_METRICS)  # setup time of a cold connection or a reused warm one
+    if conn is None:
+        return {'Completed': False, 'Error': 'Could not connect to the database', 'Connection': connection_metrics}
 
-    menu = Menu([the_y, south, two_fifty_one])
-    menu.create_menu()
+    # Dining halls to scrape, from the registry
+    halls = load_halls(conn)
 
-    conn = connect()
-    menu.update_db_menu(conn)
-    menu.get_alerts(conn)
-    alerted_emails = menu.alert_users(conn)
-    conn.close()
+    # The registry could not be read (or is empty), so there is no menu to store or alert users for
+    if not halls:
+        release(conn)
+        return {'Completed': False, 'Error': 'No dining halls loaded', 'Connection': connection_metrics}
+
+    if 'prefetch_days' in args:
+        release(conn)
+        return dict(prefetch(halls, args), Connection=connection_metrics)
+
+    # Scrape every dining hall concurrently, writing each menu to the database as soon as it is parsed
+    cache = load_page_cache(conn)
+    menu, dining_halls = stream_menu(conn, halls, cache)
+    fetch_metrics = {dining_hall.name: dining_hall.metrics.as_dict() for dining_hall in dining_halls}
+    menu_diff = menu.get_diff()
+
+    # Every page is identical to the last run, so the stored menu is up to date, and only alerts created since the
+    # last run can be new
+    unchanged = all(dining_hall.unchanged for dining_hall in dining_halls)
+    if unchanged:
+        menu.add_stored_menu(dining_halls)
 
-    return {'Alert responses': str(alerted_emails)}
+    # Nothing was scraped, so the stored menu was kept rather than replaced with an empty one
+    elif all(dining_hall.error is not None for dining_hall in dining_halls):
+        release(conn)
+        return {'Completed': False, 'Fetch metrics': fetch_metrics, 'Connection': connection_metrics}
 
+    # Only alerts for items and alerts new since the last run of the day are computed and sent, streaming the users
+    # from the database so each is emailed as soon as it is read
+    alerts = menu.alert_users_streaming(conn)
+    # Pages are only cached once their menu is stored, so a dining hall whose write failed is scraped again
+    if not unchanged:
+        save_page_cache(conn, [dining_hall for dining_hall in dining_halls
+                               if dining_hall.unchanged or dining_hall.written])
+    release(conn)
 
+    if unchanged:
+        return {'Unchanged': True, 'Alerts': alerts, 'Fetch metrics': fetch_metrics,
+                'Connection': connection_metrics}
+    return {'Alerts': alerts, 'Menu changes': menu_diff.as_dict(),
+            'Fetch metrics': fetch_metrics, 'Connection': connection_metrics}
+
+
+def prefetch(halls: list, args) -> dict:
+    """
+    Stores the upcoming menus of every dining hall, without alerting users
+    :param halls: list of Hall objects from the registry
+    :param args: function parameters, 'prefetch_days' (number of days) and optionally 'prefetch_start'
+    (first date in ISO format, defaults to tomorrow)
+    :return: dates that were stored
+    """
+    days = int(args.get('prefetch_days') or PREFETCH_DAYS)
+    start = date.fromisoformat(args['prefetch_start']) if args.get('prefetch_start') else None
+
+    menus = prefetch_menus(halls, start, days)
+
+    # Scraping can take a while, connect() reconnects if the connection was dropped meanwhile
+    conn = connect()
+    archive_pages(conn, [dining_hall for menu in menus for dining_hall in menu.dining_halls])
+    write_menus(conn, menus)
+    release(conn)
 
+    fetch_metrics = {str(menu.date): {dining_hall.name: dining_hall.metrics.as_dict()
+                                      for dining_hall in menu.dining_halls} for menu in menus}
 
+    return {'Prefetched': [str(menu.date) for menu in menus], 'Fetch metrics': fetch_metrics}
@@ -0,0 +1,70 @@
+import gzip
+from datetime import date
+import psycopg2
+from psycopg2.extras import execute_values
+
+COMPRESS_LEVEL = 9  # pages are written once and read rarely, so favour size over speed
+FETCH_SIZE = 200  # snapshots read per round trip when iterating the archive
+
+# Appends the fetched pages listed by {0}, skipping those already archived for the same location and date
+SNAPSHOT_INSERT_QUERY = '''
+    INSERT INTO accounts_menusnapshot (location_num, date, content_hash, page, date_fetched)
+    SELECT fetched.location_num, fetched.date, fetched.content_hash, fetched.page, now()
+    FROM {0} AS fetched (location_num, date, content_hash, page)
+    WHERE NOT EXISTS (
+        SELECT *
+        FROM accounts_menusnapshot
+        WHERE location_num=fetched.location_num AND date=fetched.date AND content_hash=fetched.content_hash
+    )
+'''
+
+
+def archive_pages(conn, dining_halls):
+    """
+    Appends each fetched menu page to the snapshot archive, gzip compressed
+    A page identical to one already archived for the same location and date is not stored again
+    :param conn: PostgreSQL database connection
+    :param dining_halls: list of DiningHall objects, those without a fetched page are skipped
+    :return: true if the pages were archived or there were none, false if writing them failed
+    """
+    rows = [(dining_hall.location_num, dining_hall.date, dining_hall.content_hash,
+             psycopg2.Binary(gzip.compress(dining_hall.page, COMPRESS_LEVEL)))
+            for dining_hall in dining_halls if dining_hall.page is not None]
+
+    if not rows:
+        return True
+
+    cur = conn.cursor()
+    try:
+        execute_values(cur, SNAPSHOT_INSERT_QUERY.format('(VALUES %s)'), rows)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print("Query execution unsuccessful: {0}".format(e))
+        cur.close()
+        return False
+
+    cur.close()
+    return True
+
+
+def iter_snapshots(conn, start: date = None, end: date = None):
+    """
+    Streams the latest archived page of each location and date, through a server-side cursor
+    :param conn: PostgreSQL database connection
+    :param start: first date to read, defaults to the start of the archive
+    :param end: last date to read, defaults to the end of the archive
+    :return: generator of (location number, date, gzip compressed page), in date order
+    """
+    get_snapshots_query = '''
+        SELECT DISTINCT ON (date, location_num) location_num, date, page
+        FROM accounts_menusnapshot
+        WHERE date >= %s AND date <= %s
+        ORDER BY date, location_num, date_fetched DESC
+    '''
+
+    with conn.cursor(name='menu_snapshots') as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(get_snapshots_query, (start or date.min, end or date.max))
+        for location_num, day, page in cur:
+            yield location_num, day, bytes(page)
@@ -0,0 +1,261 @@
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from bulk_load import copy_menus
+from db import connect, db_write
+from dining_hall import DiningHall, Menu
+from fetch import create_session
+from halls import DEFAULT_HALLS
+from parse import PARSERS, parse_menu_items
+from prefetch import write_menus
+from replay import ReplayServer, load_recording
+
+
+def load_pages(paths: list[str]) -> list[bytes]:
+    """
+    Reads saved menu pages from disk
+    :param paths: HTML files, directories containing .html files, or recordings made by replay.py
+    :return: list of page contents
+    """
+    pages = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pages.extend(file.read_bytes() for file in sorted(path.glob("*.html")))
+            pages.extend(load_recording(path).values())
+        else:
+            pages.append(path.read_bytes())
+    return pages
+
+
+def time_parser(parser, pages: list[bytes], repeat: int) -> float:
+    """
+    :param parser: parsing backend
+    :param pages: menu pages to parse
+    :param repeat: number of passes over pages, the fastest pass is kept
+    :return: average seconds spent parsing one page
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            parser(page)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages)
+
+
+def peak_memory(parser, pages: list[bytes]) -> float:
+    """
+    :param parser: parsing backend
+    :param pages: menu pages to parse
+    :return: average peak bytes allocated while parsing one page
+    """
+    total = 0
+    for page in pages:
+        tracemalloc.start()
+        parser(page)
+        total += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return total / len(pages)
+
+
+def benchmark_parsers(pages: list[bytes], repeat: int = 5) -> dict:
+    """
+    Measures CPU time and peak memory per page for every parsing backend
+    Raises ValueError if a backend extracts different items than the full BeautifulSoup parse
+    :param pages: menu pages to parse
+    :param repeat: number of timed passes over pages
+    :return: dictionary mapping backend name to (seconds per page, peak bytes per page)
+    """
+    for page in pages:
+        expected = PARSERS["soup"](page)
+        for name, parser in PARSERS.items():
+            if parser(page) != expected:
+                raise ValueError("Parser '{0}' disagrees with the full BeautifulSoup parse".format(name))
+
+    return {name: (time_parser(parser, pages, repeat), peak_memory(parser, pages))
+            for name, parser in PARSERS.items()}
+
+
+def benchmark_pipeline(pages: dict, workers: int = 6, latency: float = 0.0) -> dict:
+    """
+    Measures the throughput of each scraping stage over recorded pages replayed by a local server
+    :param pages: dictionary mapping (location number, date) to the HTML of the menu page
+    :param workers: max number of requests in flight at once
+    :param latency: seconds the replay server delays each response by
+    :return: dictionary mapping stage name to (seconds, units processed, unit name)
+    """
+    results = {}
+
+    with ReplayServer(pages, latency) as server:
+        dining_halls = [DiningHall(str(location_num), location_num, day=day, base_url=server.url)
+                        for location_num, day in sorted(pages, key=lambda key: (key[1], key[0]))]
+
+        with create_session(workers) as session:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda dining_hall: dining_hall.fetch(session), dining_halls))
+            results["fetch"] = (time.perf_counter() - start, len(dining_halls), "pages")
+
+    start = time.perf_counter()
+    for dining_hall in dining_halls:
+        dining_hall.parse()
+    results["parse"] = (time.perf_counter() - start, len(dining_halls), "pages")
+
+    days = {}
+    for dining_hall in dining_halls:
+        days.setdefault(dining_hall.date, []).append(dining_hall)
+
+    start = time.perf_counter()
+    items = 0
+    for day, halls_for_day in days.items():
+        menu = Menu(halls_for_day, day)
+        menu.create_menu()
+        items += sum(len(dining_hall.menu) for dining_hall in halls_for_day)
+    results["merge"] = (time.perf_counter() - start, items, "items")
+
+    return results
+
+
+def recorded_menus(pages: dict) -> list[Menu]:
+    """
+    Parses a recording into combined menus, naming dining halls from DEFAULT_HALLS
+    :param pages: dictionary mapping (location number, date) to the HTML of the menu page
+    :return: list of Menu objects, one per recorded date in date order
+    """
+    halls = {hall.location_num: hall for hall in DEFAULT_HALLS}
+    days = {}
+    for (location_num, day), page in sorted(pages.items(), key=lambda entry: (entry[0][1], entry[0][0])):
+        hall = halls.get(location_num)
+        dining_hall = DiningHall(hall.name if hall else str(location_num), location_num, day=day,
+                                 bit=hall.bit if hall else None)
+        dining_hall.page = page
+        dining_hall.parse()
+        dining_hall.page = None
+        days.setdefault(day, []).append(dining_hall)
+
+    menus = []
+    for day, dining_halls in days.items():
+        menu = Menu(dining_halls, day)
+        menu.create_menu()
+        menus.append(menu)
+    return menus
+
+
+def benchmark_load(conn, menus: list[Menu], repeat: int = 3) -> dict:
+    """
+    Measures how fast each bulk write path stores Daily Menu rows
+    The Daily Menu rows of the menus' dates are deleted before each timed load, so every load writes every row
+    instead of skipping the unchanged ones: run it against a test database
+    :param conn: PostgreSQL database connection
+    :param menus: combined Menu objects to store
+    :param repeat: number of timed loads per path, the fastest is kept
+    :return: dictionary mapping write path name to (seconds, rows written)
+    """
+    paths = {
+        "insert": lambda: write_menus(conn, menus),
+        "copy": lambda: copy_menus(conn, menus),
+    }
+    rows = sum(len(menu.total_menu) for menu in menus)
+
+    daily_menu_clear_query = '''
+        DELETE FROM accounts_dailymenu
+        WHERE date = ANY(%s)
+    '''
+
+    results = {}
+    for name, load in paths.items():
+        best = float("inf")
+        for _ in range(repeat):
+            db_write(conn, daily_menu_clear_query, [menu.date for menu in menus])
+            start = time.perf_counter()
+            load()
+            best = min(best, time.perf_counter() - start)
+        results[name] = (best, rows)
+    return results
+
+
+def print_parsers(args):
+    """
+    Prints CPU time and peak memory per page of each parsing backend
+    :param args: parsed command line arguments
+    """
+    pages = load_pages(args.pages)
+    if not pages:
+        raise SystemExit("no .html pages found")
+
+    results = benchmark_parsers(pages, args.repeat)
+    base_time, base_memory = results["soup"]
+
+    print("{0} pages, {1:.0f} KiB average".format(len(pages), sum(map(len, pages)) / len(pages) / 1024))
+    print("{0:<10}{1:>12}{2:>10}{3:>14}{4:>10}".format("backend", "ms/page", "cpu", "peak KiB/page", "memory"))
+    for name, (seconds, memory) in results.items():
+        print("{0:<10}{1:>12.2f}{2:>9.0%}{3:>14.0f}{4:>9.0%}".format(
+            name, seconds * 1000, seconds / base_time, memory / 1024, memory / base_memory))
+
+
+def print_pipeline(args):
+    """
+    Prints the throughput of fetching, parsing and merging a recording
+    :param args: parsed command line arguments
+    """
+    pages = load_recording(args.recording)
+    if not pages:
+        raise SystemExit("no recorded pages found")
+
+    results = benchmark_pipeline(pages, args.workers, args.latency)
+
+    print("{0} pages over {1} days, parsed with {2}".format(
+        len(pages), len({day for _, day in pages}), parse_menu_items.__name__))
+    print("{0:<8}{1:>10}{2:>10}{3:>16}".format("stage", "seconds", "units", "throughput"))
+    for stage, (seconds, units, unit_name) in results.items():
+        print("{0:<8}{1:>10.3f}{2:>10}{3:>10.0f} {4}/s".format(stage, seconds, units, units / seconds, unit_name))
+
+
+def print_load(args):
+    """
+    Prints the rows per second of loading a recording into the database through each bulk write path
+    :param args: parsed command line arguments
+    """
+    pages = load_recording(args.recording)
+    if not pages:
+        raise SystemExit("no recorded pages found")
+
+    menus = recorded_menus(pages)
+    conn = connect()
+    results = benchmark_load(conn, menus, args.repeat)
+    conn.close()
+
+    print("{0} days of menus, {1} to {2}".format(len(menus), menus[0].date, menus[-1].date))
+    print("{0:<8}{1:>10}{2:>10}{3:>14}".format("path", "seconds", "rows", "rows/s"))
+    for name, (seconds, rows) in results.items():
+        print("{0:<8}{1:>10.3f}{2:>10}{3:>14.0f}".format(name, seconds, rows, rows / seconds))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmarks for scraping dining hall menus offline")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    parsers_parser = commands.add_parser("parsers", help="compare parsing backends on saved pages")
+    parsers_parser.add_argument("pages", nargs="+", help="saved menu pages (.html files, directories of them or recordings)")
+    parsers_parser.add_argument("--repeat", type=int, default=5, help="timed passes over the pages")
+    parsers_parser.set_defaults(run=print_parsers)
+
+    pipeline_parser = commands.add_parser("pipeline", help="fetch, parse and merge a recording (see replay.py)")
+    pipeline_parser.add_argument("recording", help="root directory of the recording")
+    pipeline_parser.add_argument("--workers", type=int, default=6, help="max requests in flight at once")
+    pipeline_parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay each response by")
+    pipeline_parser.set_defaults(run=print_pipeline)
+
+    load_parser = commands.add_parser("load", help="bulk load a recording into DATABASE_URL, replacing its dates")
+    load_parser.add_argument("recording", help="root directory of the recording")
+    load_parser.add_argument("--repeat", type=int, default=3, help="timed loads per write path")
+    load_parser.set_defaults(run=print_load)
+
+    args = arg_parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
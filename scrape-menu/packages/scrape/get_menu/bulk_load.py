@@ -0,0 +1,128 @@
+import io
+from dining_hall import DAILY_MENU_ON_CONFLICT
+
+COPY_BUFFER_SIZE = 1 << 16  # bytes handed to COPY per read
+
+# Session-local table the rows are copied into, dropped with the transaction
+STAGING_TABLE_QUERY = '''
+    CREATE TEMPORARY TABLE daily_menu_staging (
+        item text NOT NULL,
+        date date NOT NULL,
+        dining_halls bigint NOT NULL
+    ) ON COMMIT DROP
+'''
+
+
+def escape_copy_text(value: str) -> str:
+    """
+    :param value: text to send in COPY's text format
+    :return: value with backslashes, tabs and line breaks escaped
+    """
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def iter_copy_lines(menus):
+    """
+    :param menus: iterable of combined Menu objects
+    :return: generator of the Daily Menu rows of each menu, one line of COPY text format at a time
+    """
+    for menu in menus:
+        day = menu.date.isoformat()
+        for item_name, item_obj in menu.total_menu.items():
+            yield '{0}\t{1}\t{2}\n'.format(escape_copy_text(item_name), day, menu.get_hall_mask(item_obj))
+
+
+class CopyStream(io.RawIOBase):
+    """
+    Read-only file over a generator of text lines, so COPY can consume rows as they are produced
+    """
+
+    def __init__(self, lines):
+        """
+        Initializes CopyStream object
+        :param lines: iterable of lines in COPY text format
+        """
+        self._lines = iter(lines)
+        self._buffer = b''
+        self.rows = 0  # lines read so far
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        """
+        :param size: max bytes to return, -1 for everything left
+        :return: next bytes of the stream, empty once the lines are exhausted
+        """
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunk = line.encode('utf-8')
+            chunks.append(chunk)
+            length += len(chunk)
+            self.rows += 1
+
+        self._buffer = b''.join(chunks)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_menus(conn, menus) -> int:
+    """
+    Bulk loads the menus of many days, e.g. a backfill, in one transaction
+    Rows are streamed through COPY FROM STDIN into a staging table, then merged with set-based statements:
+    new items are inserted to the Menu table and each day's Daily Menu rows are upserted, deleting items that
+    are no longer served
+    :param conn: PostgreSQL database connection
+    :param menus: iterable of combined Menu objects, each date at most once
+    :return: number of Daily Menu rows loaded, 0 if the load failed
+    """
+    menu_insert_query = '''
+        INSERT INTO accounts_menu (item)
+        SELECT DISTINCT item
+        FROM daily_menu_staging
+        ON CONFLICT (item) DO NOTHING
+    '''
+
+    daily_menu_delete_query = '''
+        DELETE FROM accounts_dailymenu
+        WHERE date IN (SELECT DISTINCT date FROM daily_menu_staging)
+            AND NOT EXISTS (
+                SELECT *
+                FROM daily_menu_staging AS staging
+                JOIN accounts_menu ON accounts_menu.item = staging.item
+                WHERE accounts_menu.id = accounts_dailymenu.menu_item_id AND staging.date = accounts_dailymenu.date
+            )
+    '''
+
+    daily_menu_upsert_query = '''
+        INSERT INTO accounts_dailymenu (menu_item_id, date, dining_halls)
+        SELECT accounts_menu.id, staging.date, staging.dining_halls
+        FROM daily_menu_staging AS staging
+        JOIN accounts_menu ON accounts_menu.item = staging.item
+    ''' + DAILY_MENU_ON_CONFLICT
+
+    stream = CopyStream(iter_copy_lines(menus))
+
+    cur = conn.cursor()
+    try:
+        cur.execute(STAGING_TABLE_QUERY)
+        cur.copy_expert('COPY daily_menu_staging FROM STDIN', stream, size=COPY_BUFFER_SIZE)
+        cur.execute('ANALYZE daily_menu_staging')  # temporary tables are never analyzed automatically
+        cur.execute(menu_insert_query)
+        cur.execute(daily_menu_delete_query)
+        cur.execute(daily_menu_upsert_query)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print("Query execution unsuccessful: {0}".format(e))
+        stream.rows = 0
+
+    cur.close()
+    return stream.rows
@@ -1,19 +1,78 @@
 import os
+import time
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 
-DATABASE_URL = os.environ['DATABASE_URL']
+DATABASE_URL = os.environ.get('DATABASE_URL')  # optional, so modules can be imported offline
+CONNECT_TIMEOUT = 10  # seconds to wait for the database server to accept a connection
+KEEPALIVES_IDLE = 30  # seconds idle before TCP keepalive probes, so a dropped connection is noticed
+
+# Kept open between warm invocations of the function, which run in the same process
+_connection = None
+
+# How the last connection was set up: 'reused' (bool) and 'setup_ms' (float), reported by each invocation
+CONNECTION_METRICS = {}
+
+
+def open_connection() -> psycopg2.extensions.connection:
+    """
+    :return: new SSL connection to PostgreSQL database
+    """
+    return psycopg2.connect(DATABASE_URL, sslmode='require', connect_timeout=CONNECT_TIMEOUT,
+                            keepalives=1, keepalives_idle=KEEPALIVES_IDLE)
+
+
+def is_healthy(conn) -> bool:
+    """
+    Pings the connection, ending any transaction a previous invocation left open
+    :param conn: PostgreSQL database connection, or None
+    :return: true if the connection can still run queries
+    """
+    if conn is None or conn.closed:
+        return False
+
+    try:
+        if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
 
 
 def connect() -> psycopg2.extensions.connection:
     """
+    Returns the connection kept from a previous warm invocation if it is healthy, otherwise reconnects
+    Pass the connection to release() rather than closing it, so the next invocation can reuse it
     :return: conection to PostgreSQL database
     """
-    try:
-        with psycopg2.connect(DATABASE_URL, sslmode='require') as conn:
-            return conn
+    global _connection
+
+    start = time.perf_counter()
+    reused = is_healthy(_connection)
+    if not reused:
+        if _connection is not None and not _connection.closed:
+            _connection.close()
+        try:
+            _connection = open_connection()
+        except (psycopg2.DatabaseError, Exception) as e:
+            _connection = None
+            print(e)
 
-    except (psycopg2.DatabaseError, Exception) as e:
-        print(e)
+    CONNECTION_METRICS['reused'] = reused
+    CONNECTION_METRICS['setup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return _connection
+
+
+def release(conn: psycopg2.extensions.connection):
+    """
+    Ends the connection's transaction but leaves it open for the next invocation
+    :param conn: connection returned by connect()
+    """
+    if conn is not None and not conn.closed:
+        conn.rollback()
 
 
 def db_write(db: psycopg2.extensions.connection, query, *args):
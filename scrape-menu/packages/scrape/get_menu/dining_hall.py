@@ -1,18 +1,117 @@
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 import requests
-from bs4 import BeautifulSoup
+from psycopg2.extras import Json, execute_values
 from db import db_select, db_write
-from send_email import send_alert
+from fetch import MAX_CONCURRENT_REQUESTS, REQUEST_TIMEOUT, FetchMetrics, create_session, fetch_page
+from keywords import GET_KEYWORDS_QUERY, KEYWORD_MATCHER
+from menu_items import MENU_ITEM_IDS, database_key
+from page_cache import CachedPage, hash_page
+from parse import parse_menu_items
+from send_email import MAILGUN_BATCH_SIZE, send_alert_batch
 
 # Constants for web scraping
 BASE_URL = "https://nutrition.umd.edu"
-MENU_TAG = "a"
-MENU_CLASS = "menu-item-name"
+
+# Rows already stored for an item and date are overwritten only if they differ, so rewriting a menu is a no-op
+DAILY_MENU_ON_CONFLICT = '''
+    ON CONFLICT (menu_item_id, date) DO UPDATE
+    SET dining_halls = EXCLUDED.dining_halls
+    WHERE accounts_dailymenu.dining_halls <> EXCLUDED.dining_halls
+'''
+
+DAILY_MENU_UPSERT_QUERY = '''
+    INSERT INTO accounts_dailymenu (menu_item_id, date, dining_halls)
+    VALUES %s
+''' + DAILY_MENU_ON_CONFLICT
+
+GET_DAILY_MENU_QUERY = '''
+    SELECT accounts_menu.item, accounts_menu.id, dining_halls
+    FROM accounts_dailymenu
+    JOIN accounts_menu ON accounts_menu.id = accounts_dailymenu.menu_item_id
+    WHERE date=%s
+'''
+
+# Clears a dining hall's bit from the rows of the items it stopped serving
+DAILY_MENU_REMOVE_QUERY = '''
+    UPDATE accounts_dailymenu
+    SET dining_halls = dining_halls & ~%s
+    WHERE date=%s AND menu_item_id = ANY(%s)
+'''
+
+DAILY_MENU_DELETE_QUERY = '''
+    DELETE FROM accounts_dailymenu
+    WHERE date=%s AND menu_item_id = ANY(%s)
+'''
+
+ALERT_HISTORY_DAYS = 7  # days the sent alerts and alert runs of a date are kept
+RECIPIENT_FETCH_SIZE = 1000  # recipients read per round trip when streaming alerts
+
+# Returns what the last run of a date computed alerts for (NULL on the first run), with the highest alert id, and
+# the count and highest id of keywords, in one round trip
+GET_ALERT_RUN_QUERY = '''
+    SELECT accounts_alertrun.items, accounts_alertrun.last_alert_id, accounts_alertrun.last_keyword_id,
+           (SELECT coalesce(max(id), 0) FROM accounts_alert),
+           (SELECT count(*) FROM accounts_keywordalert),
+           (SELECT coalesce(max(id), 0) FROM accounts_keywordalert)
+    FROM (SELECT 1) AS run
+    LEFT JOIN accounts_alertrun ON accounts_alertrun.date = %s
+'''
+
+# Returns one row per user receiving email alerts with alerts or keywords for the items, in user id order, as
+# (user id, email, receive email alerts, auth token, items alerted for, keywords, whether each keyword has a higher
+# id than given, items already sent on the date). Alerts are only read for the new items, or for any item if the
+# alert has a higher id than given
+STREAM_ALERTS_QUERY = '''
+    SELECT accounts_profile.id, accounts_profile.email, accounts_profile.receive_email_alerts, authtoken_token.key,
+           alerted.items, keyworded.keywords, keyworded.new,
+           ARRAY(
+               SELECT accounts_menu.item
+               FROM accounts_sentalert
+               JOIN accounts_menu ON accounts_menu.id = accounts_sentalert.menu_item_id
+               WHERE accounts_sentalert.user_id = accounts_profile.id AND accounts_sentalert.date=%s
+           )
+    FROM accounts_profile
+    LEFT JOIN (
+        SELECT accounts_alert.user_id, array_agg(DISTINCT menu.item) AS items
+        FROM unnest(%s::text[]) AS menu (item)
+        JOIN accounts_menu ON accounts_menu.item = menu.item
+        JOIN accounts_alert ON accounts_alert.menu_item_id = accounts_menu.id
+        WHERE menu.item = ANY(%s) OR accounts_alert.id > %s
+        GROUP BY accounts_alert.user_id
+    ) AS alerted ON alerted.user_id = accounts_profile.id
+    LEFT JOIN (
+        SELECT user_id, array_agg(keyword ORDER BY id) AS keywords, array_agg(id > %s ORDER BY id) AS new
+        FROM accounts_keywordalert
+        WHERE keyword = ANY(%s)
+        GROUP BY user_id
+    ) AS keyworded ON keyworded.user_id = accounts_profile.id
+    LEFT JOIN authtoken_token ON authtoken_token.user_id = accounts_profile.id
+    WHERE accounts_profile.receive_email_alerts AND (alerted.user_id IS NOT NULL OR keyworded.user_id IS NOT NULL)
+    ORDER BY accounts_profile.id
+'''
+
+SENT_ALERT_INSERT_QUERY = '''
+    INSERT INTO accounts_sentalert (user_id, menu_item_id, date, date_sent)
+    SELECT sent.user_id, accounts_menu.id, %s, now()
+    FROM unnest(%s::bigint[], %s::text[]) AS sent (user_id, item)
+    JOIN accounts_menu ON accounts_menu.item = sent.item
+    ON CONFLICT (user_id, menu_item_id, date) DO NOTHING
+'''
+
+ALERT_RUN_UPSERT_QUERY = '''
+    INSERT INTO accounts_alertrun (date, items, last_alert_id, last_keyword_id, date_updated)
+    VALUES (%s, %s, %s, %s, now())
+    ON CONFLICT (date) DO UPDATE
+    SET items=EXCLUDED.items, last_alert_id=EXCLUDED.last_alert_id, last_keyword_id=EXCLUDED.last_keyword_id,
+        date_updated=EXCLUDED.date_updated
+'''
 
 
 class DiningHall:
     """
     Stores information pertaining to a dining hall and functionality to web scrape menu data
+    Constructing a DiningHall does no network I/O, the menu is fetched and parsed on first use
 
     Attributes
     __________
@@ -20,55 +119,212 @@ class DiningHall:
         name of the dining hall
     location_num : int
         identifier used by the dining hall website
+    bit : int
+        position of the dining hall in the Daily Menu dining_halls bitmask, None if it is not registered
+    date : date
+        date of the menu
+    base_url : str
+        url of the dining hall website
+    url : str
+        url to the dining hall's menu for its date
+    page : bytes
+        raw HTML of the menu page, None until fetched
     menu: set[str]
-        contains items in the menu of the dining hall
+        contains items in the menu of the dining hall, fetched and parsed on first access
+    session : requests.Session
+        HTTP session used to request the menu, shared between dining halls
+    timeout : (float, float)
+        seconds to wait on the dining hall website for a connection and between bytes of the response
+    metrics : FetchMetrics
+        attempts, latency and outcome of the last fetch
+    error : Exception
+        error that stopped the menu from being fetched or parsed, None if there was none
+    etag : str
+        ETag header of the fetched page
+    last_modified : str
+        Last-Modified header of the fetched page
+    content_hash : str
+        SHA-256 hex digest of the fetched page, None until fetched
+    unchanged : bool
+        true if the fetched page is identical to the cached page it was requested against
+    written : bool
+        true once the fetched page is archived and the menu's changes are committed to the database
 
     Methods
     _________
     get_url()
-        Returns the url to the current dining hall's menu for today
-    scrape_menu()
-        Web-scrapes the menu of the dining hall for the current day, returning a set of items
+        Returns the url to the current dining hall's menu for its date
+    fetch(session, cached)
+        Requests the menu page of the dining hall, storing its HTML in page
+    parse()
+        Extracts the menu items from page, fetching it first if needed
     """
 
-    def __init__(self, name: str, location_num: int):
+    def __init__(self, name: str, location_num: int, session: requests.Session = None,
+                 timeout=REQUEST_TIMEOUT, day: date = None, base_url: str = BASE_URL, bit: int = None):
         """
-        Initializes the DiningHall object and generates menu
+        Initializes the DiningHall object, without requesting its menu
         :param name: name of the dining hall
         :param location_num: identifier used by the dining hall website
+        :param session: HTTP session to request the menu with, a new connection is made if not given
+        :param timeout: (connect, read) seconds to wait on the dining hall website
+        :param day: date of the menu, defaults to today
+        :param base_url: url of the dining hall website, overridden to replay recorded pages
+        :param bit: position of the dining hall in the Daily Menu dining_halls bitmask
         """
         self.name = name
         self.location_num = location_num
+        self.bit = bit
+        self.session = session
+        self.timeout = timeout
+        self.date = day or date.today()
+        self.base_url = base_url
         self.url = self.get_url()
-        self.menu = self.scrape_menu()
+        self.page = None
+        self._menu = None
+        self.metrics = FetchMetrics()
+        self.error = None
+        self.etag = ''
+        self.last_modified = ''
+        self.content_hash = None
+        self.unchanged = False
+        self.written = False
+
+    @property
+    def menu(self) -> set[str]:
+        """
+        :return: set of items on the menu, scraped the first time it is accessed
+        """
+        if self._menu is None:
+            self.parse()
+        return self._menu
 
     def get_url(self) -> str:
         """
-        :return: url to the current dining hall's menu for today
+        :return: url to the current dining hall's menu for its date
         """
-        month = date.today().month
-        day = date.today().day
-        year = date.today().year
+        month = self.date.month
+        day = self.date.day
+        year = self.date.year
 
-        return BASE_URL + "/?locationNum=" + str(self.location_num) + "&dtdate=" + str(month) + "/" + str(
+        return self.base_url + "/?locationNum=" + str(self.location_num) + "&dtdate=" + str(month) + "/" + str(
             day) + "/" + str(year)
 
-    def scrape_menu(self) -> set[str]:
+    def fetch(self, session: requests.Session = None, cached: CachedPage = None) -> bytes:
+        """
+        Requests the menu page of the dining hall, storing its HTML in page
+        If a cached page is given, the request is conditional and unchanged is set when the page is the same
+        :param session: HTTP session to request the page with, defaults to the dining hall's session
+        :param cached: validators of the last fetched page for the same day
+        :return: HTML of the menu page, None if the website reported the cached page has not been modified
         """
-        Web-scrapes the menu of the dining hall for the current day
+        session = session or self.session
+        headers = cached.request_headers() if cached is not None else {}
+        self.metrics = FetchMetrics()
+
+        if session is None:
+            with create_session(1) as session:
+                response = fetch_page(session, self.url, headers, self.timeout, self.metrics)
+        else:
+            response = fetch_page(session, self.url, headers, self.timeout, self.metrics)
+
+        self._menu = None  # a new page invalidates the parsed menu
+
+        if cached is not None and response.status_code == 304:
+            # Not modified, so the website sent no body
+            self.page = None
+            self.etag = response.headers.get('ETag', cached.etag)
+            self.last_modified = response.headers.get('Last-Modified', cached.last_modified)
+            self.content_hash = cached.content_hash
+            self.unchanged = True
+            return None
+
+        self.page = response.content
+        self.etag = response.headers.get('ETag', '')
+        self.last_modified = response.headers.get('Last-Modified', '')
+        self.content_hash = hash_page(self.page)
+        self.unchanged = cached is not None and cached.content_hash == self.content_hash
+        return self.page
+
+    def parse(self) -> set[str]:
+        """
+        Extracts the menu items from the fetched page, fetching it first if needed
         :return: set of items on the menu
         """
-        # Set up web scraper
-        page = requests.get(self.url, verify=False)
-        soup = BeautifulSoup(page.content, "html.parser")
+        if self.page is None:
+            self.fetch()
 
-        items = set()
+        self._menu = parse_menu_items(self.page)
+        return self._menu
 
-        # Iterate through each menu item found in webpage, add to items set
-        for line in soup.find_all(MENU_TAG, class_=MENU_CLASS):
-            items.add(line.text)
+def scrape_dining_halls(halls: list, timeouts: dict = None, cache: dict = None, day: date = None,
+                        max_workers: int = MAX_CONCURRENT_REQUESTS, on_parsed=None) -> list[DiningHall]:
+    """
+    Web-scrapes the menus of the dining halls concurrently, through one shared session
+    If every page is unchanged from the cache, each DiningHall is left unchanged and unparsed
+    A dining hall that could not be scraped has its error set, the others are still scraped
+    :param halls: list of Hall objects from the registry
+    :param timeouts: optional dictionary mapping dining hall names to (connect, read) timeouts of their menu
+    :param cache: optional dictionary mapping location numbers to CachedPage objects
+    :param day: date of the menus, defaults to today
+    :param max_workers: max number of requests in flight at once
+    :param on_parsed: optional function called with each DiningHall whose menu is part of the combined menu,
+    as soon as it is ready
+    :return: list of DiningHall objects, in the same order as halls
+    """
+    timeouts = timeouts or {}
+    dining_halls = [DiningHall(hall.name, hall.location_num, timeout=timeouts.get(hall.name, REQUEST_TIMEOUT),
+                               day=day, bit=hall.bit)
+                    for hall in halls]
 
-        return items
+    with create_session(max_workers) as session:
+        run_dining_halls(dining_halls, session, cache, max_workers, on_parsed)
+
+        # If any menu changed, the full menu is rebuilt, so re-request pages the website didn't resend
+        if not all(dining_hall.unchanged for dining_hall in dining_halls):
+            run_dining_halls([dining_hall for dining_hall in dining_halls
+                              if dining_hall.unchanged and dining_hall.page is None], session,
+                             max_workers=max_workers, on_parsed=on_parsed)
+
+            # Pages that were resent identical to the cache still have to be part of the full menu
+            if on_parsed is not None:
+                for dining_hall in dining_halls:
+                    if dining_hall.unchanged and dining_hall.page is not None:
+                        on_parsed(dining_hall)
+
+    return dining_halls
+
+
+def run_dining_halls(dining_halls: list[DiningHall], session: requests.Session, cache: dict = None,
+                     max_workers: int = None, on_parsed=None):
+    """
+    Fetches and parses the menu of each dining hall concurrently
+    Pages that are unchanged from the cache are not parsed
+    A dining hall that fails has its error set, without stopping the others
+    :param dining_halls: list of DiningHall objects that have not been scraped yet
+    :param session: HTTP session shared by every request
+    :param cache: optional dictionary mapping location numbers to CachedPage objects
+    :param max_workers: max number of requests in flight at once, defaults to one per dining hall
+    :param on_parsed: optional function called with each DiningHall from its worker thread once it is parsed
+    """
+    cache = cache or {}
+
+    def scrape(dining_hall):
+        dining_hall.error = None
+        try:
+            dining_hall.fetch(session, cache.get(dining_hall.location_num))
+            if not dining_hall.unchanged:
+                dining_hall.parse()
+        except Exception as e:
+            dining_hall.error = e
+            print("Scraping {0} unsuccessful: {1}".format(dining_hall.name, e))
+            return
+
+        if on_parsed is not None and not dining_hall.unchanged:
+            on_parsed(dining_hall)
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(dining_halls), 1)) as executor:
+        list(executor.map(scrape, dining_halls))
 
 
 class Menu:
@@ -79,143 +335,407 @@ class Menu:
     __________
     dining_halls : [DiningHall]
         list of DiningHall objects
+    date : date
+        date of the menu
     total_menu : {str : Item}
         dictionary mapping menu items to Item objects
-    users_to_alert : {int : User}
-        dictionary mapping user_ids to User objects
+    stored : {str : (int, int)}
+        dictionary mapping the items stored in Daily Menu table for the date to their menu item id and hall bitmask,
+        None until load_db_menu() is called
 
     Methods
     _________
     create_menu()
         Combines menus from each dining hall into one, storing result in total_menu
-    update_db_menu(conn)
-        Insert new menu items to Menu table and all items to Daily Menu table
-    get_alerts(conn)
-        Checks with database if there are users to alert, storing result in users_to_alert
-    alert_users()
-        Send alert emails to users
+    add_dining_hall(dining_hall)
+        Adds the menu of one dining hall to total_menu
+    add_stored_menu(dining_halls)
+        Fills total_menu with the menu stored for the date
+    get_hall_mask(item)
+        Returns the bitmask of the dining halls serving an item
+    get_scraped_mask()
+        Returns the bitmask of the dining halls that were scraped
+    get_daily_menu_rows(menu_item_ids)
+        Returns the Daily Menu rows of total_menu
+    load_db_menu(conn)
+        Reads the Daily Menu rows already stored for the date, storing result in stored
+    update_db_dining_hall(conn, dining_hall)
+        Insert the items of one dining hall to Menu and Daily Menu tables
+    prune_db_menu(conn)
+        Delete the Daily Menu rows of the menu's date that no dining hall serves
+    get_diff()
+        Returns the changes written to Daily Menu table since load_db_menu()
+    iter_alerts(conn)
+        Streams the users to email one at a time, in user id order
+    alert_users_streaming(conn)
+        Send alert emails in batches to users as they are streamed by iter_alerts()
+    record_sent_alerts(conn, users_sent)
+        Records the alerts sent to users
+    save_alert_run(conn, users_sent, complete)
+        Records the alerts sent, so later runs of the day only compute and send new alerts
     """
 
-    def __init__(self, dining_halls):
+    def __init__(self, dining_halls, day: date = None):
         """
         Initializes the Menu object
 
         :param dining_halls: list of DiningHall objects
+        :param day: date of the menu, defaults to today
         """
         self.dining_halls = dining_halls
+        self.date = day or date.today()
         self.total_menu = {}
-        self.users_to_alert = {}
+        self.stored = None
+        self._loaded = {}
+        self._alert_run = None
 
     def create_menu(self):
         """
         Combines menus from each dining hall into one, storing result in total_menu
+        Dining halls that could not be scraped are left out
         """
         for dining_hall in self.dining_halls:
-            for item in dining_hall.menu:
-                if item in self.total_menu:
-                    # if item has already been seen, add current dining hall to its list
-                    self.total_menu[item].dining_halls.append(dining_hall.name)
-                else:
-                    # otherwise, create new Item object and initialize its list with current dining hall
-                    self.total_menu[item] = Item(item)
-                    self.total_menu[item].dining_halls = [dining_hall.name]
-
-    def update_db_menu(self, conn):
-        """
-        Insert new menu items to Menu table and all items to Daily Menu table
+            if dining_hall.error is not None:
+                continue
+
+            self.add_dining_hall(dining_hall)
+
+    def add_dining_hall(self, dining_hall: DiningHall):
+        """
+        Adds the menu of one dining hall to total_menu, and the dining hall to dining_halls if it is missing
+        :param dining_hall: scraped DiningHall object
+        """
+        if dining_hall not in self.dining_halls:
+            self.dining_halls.append(dining_hall)
+
+        for item in dining_hall.menu:
+            if item in self.total_menu:
+                # if item has already been seen, add current dining hall to its list
+                self.total_menu[item].dining_halls.append(dining_hall.name)
+            else:
+                # otherwise, create new Item object and initialize its list with current dining hall
+                self.total_menu[item] = Item(item)
+                self.total_menu[item].dining_halls = [dining_hall.name]
+
+    def add_stored_menu(self, dining_halls: list[DiningHall]):
+        """
+        Fills total_menu with the Daily Menu rows stored for the menu's date, for runs where no page changed
+        :param dining_halls: DiningHall objects of the registered dining halls
+        """
+        for item, (menu_item_id, mask) in (self.stored or {}).items():
+            self.total_menu[item] = Item(item)
+            self.total_menu[item].dining_halls = [dining_hall.name for dining_hall in dining_halls
+                                                  if dining_hall.bit is not None and mask & (1 << dining_hall.bit)]
+
+    def get_hall_mask(self, item) -> int:
+        """
+        :param item: Item object from total_menu
+        :return: bitmask of the registered dining halls serving the item, for Daily Menu dining_halls
+        """
+        mask = 0
+        for dining_hall in self.dining_halls:
+            if dining_hall.bit is not None and dining_hall.name in item.dining_halls:
+                mask |= 1 << dining_hall.bit
+        return mask
+
+    def get_scraped_mask(self) -> int:
+        """
+        :return: bitmask of the registered dining halls scraped without error, the only ones whose Daily Menu bits
+            are rewritten, so a dining hall that failed keeps the items stored for it
+        """
+        mask = 0
+        for dining_hall in self.dining_halls:
+            if dining_hall.bit is not None and dining_hall.error is None:
+                mask |= 1 << dining_hall.bit
+        return mask
+
+    def get_daily_menu_rows(self, menu_item_ids: dict) -> list[tuple]:
+        """
+        :param menu_item_ids: dictionary mapping every item of total_menu to its id in Menu table
+        :return: Daily Menu rows of total_menu, in the column order of DAILY_MENU_UPSERT_QUERY
+        """
+        return [(menu_item_ids[item_name], self.date, self.get_hall_mask(item_obj))
+                for item_name, item_obj in self.total_menu.items()]
+
+    def load_db_menu(self, conn):
+        """
+        Reads the Daily Menu rows already stored for the menu's date, so only the differences are written
         :param conn: PostgreSQL database connection
         """
+        rows = db_select(conn, GET_DAILY_MENU_QUERY, self.date)
 
-        for key in self.total_menu.keys():
-            # Insert new items to Menu table
-            menu_insert_query = '''
-                INSERT INTO accounts_menu (item)
-                SELECT %s
-                WHERE NOT EXISTS (SELECT * FROM accounts_menu WHERE item=%s)
-            '''
-            db_write(conn, menu_insert_query, key, key)
+        self.stored = {row[0]: (row[1], row[2]) for row in rows}
+        self._loaded = dict(self.stored)
 
-            # Insert all items to Daily Menu table
-            at_y = 'Yahentamitsi' in self.total_menu[key].dining_halls
-            at_south = 'South' in self.total_menu[key].dining_halls
-            at_251 = '251' in self.total_menu[key].dining_halls
+    def update_db_dining_hall(self, conn, dining_hall: DiningHall):
+        """
+        Compares the items of one dining hall with those stored for it on the menu's date, and only writes the
+        difference: new items are inserted to Menu table, and the dining hall is added to or removed from the
+        Daily Menu rows of the items it started or stopped serving
+        :param conn: PostgreSQL database connection
+        :param dining_hall: scraped DiningHall object
+        :return: true if the changes were committed or there were none, false if writing them failed
+        """
+        if self.stored is None:
+            self.load_db_menu(conn)
+
+        if dining_hall.bit is None:  # not registered, so it has no bit to store
+            return True
+        hall, added, removed = self._get_dining_hall_changes(dining_hall)
+        if not added and not removed:
+            return True
+
+        # Merges this dining hall into rows other dining halls stored
+        daily_menu_merge_query = '''
+            INSERT INTO accounts_dailymenu AS stored (menu_item_id, date, dining_halls)
+            VALUES %s
+            ON CONFLICT (menu_item_id, date) DO UPDATE
+            SET dining_halls = stored.dining_halls | EXCLUDED.dining_halls
+        '''
 
-            # Get foreign key for menu item
-            get_menu_item_query = '''
-                SELECT * 
-                FROM accounts_menu
-                WHERE item=%s
-            '''
+        cur = conn.cursor()
+        try:
+            menu_item_ids = MENU_ITEM_IDS.upsert(cur, added)
+            if added:
+                execute_values(cur, daily_menu_merge_query,
+                               [(menu_item_ids[item], self.date, hall) for item in added], page_size=1000)
+            if removed:
+                cur.execute(DAILY_MENU_REMOVE_QUERY, (hall, self.date, [self.stored[item][0] for item in removed]))
+            conn.commit()
+            MENU_ITEM_IDS.commit()
+        except Exception as e:
+            conn.rollback()
+            MENU_ITEM_IDS.rollback()
+            print("Query execution unsuccessful: {0}".format(e))
+            cur.close()
+            return False
+
+        cur.close()
+        self._store_dining_hall_changes(hall, added, removed, menu_item_ids)
+        return True
+
+    def _get_dining_hall_changes(self, dining_hall: DiningHall) -> tuple[int, list, list]:
+        """
+        :param dining_hall: scraped DiningHall object, with a bit
+        :return: (bit of the dining hall, items it started serving, items it stopped serving) compared to stored
+        """
+        hall = 1 << dining_hall.bit
+        served = {item for item, (_, mask) in self.stored.items() if mask & hall}
+        return hall, sorted(set(dining_hall.menu) - served), sorted(served - set(dining_hall.menu))
 
-            rows = db_select(conn, get_menu_item_query, key)
-            menu_item_id = rows[0][0]
+    def _store_dining_hall_changes(self, hall: int, added: list, removed: list, menu_item_ids: dict):
+        """
+        Applies a dining hall's changes to stored, once they are committed
+        :param hall: bit of the dining hall
+        :param added: items the dining hall started serving
+        :param removed: items the dining hall stopped serving
+        :param menu_item_ids: dictionary mapping every added item to its id in Menu table
+        """
+        for item in added:
+            mask = self.stored[item][1] if item in self.stored else 0
+            self.stored[item] = (menu_item_ids[item], mask | hall)
+        for item in removed:
+            menu_item_id, mask = self.stored[item]
+            self.stored[item] = (menu_item_id, mask & ~hall)
+
+    def prune_db_menu(self, conn):
+        """
+        Delete the Daily Menu rows of the menu's date that no dining hall serves anymore
+        :param conn: PostgreSQL database connection
+        """
+        if self.stored is None:
+            self.load_db_menu(conn)
 
-            daily_menu_insert_query = '''
-                INSERT INTO accounts_dailymenu 
-                    (menu_item_id, date, yahentamitsi_dining_hall, south_dining_hall, two_fifty_one_dining_hall)
-                VALUES
-                    (%s, %s, %s, %s, %s)
-            '''
+        unserved = [item for item, (_, mask) in self.stored.items() if not mask]
+        if not unserved:
+            return
 
-            db_write(conn, daily_menu_insert_query, menu_item_id, date.today(), at_y, at_south, at_251)
+        db_write(conn, DAILY_MENU_DELETE_QUERY, self.date, [self.stored[item][0] for item in unserved])
 
-        return {'Completed': True}
+        for item in unserved:
+            del self.stored[item]
 
-    def get_alerts(self, conn):
+    def get_diff(self):
+        """
+        :return: MenuDiff of the Daily Menu rows written since load_db_menu()
         """
-        Appends to users_to_alert users with alerts for the current menu
+        return MenuDiff(self.date, self._loaded, self.stored or {})
+
+    def _match_keywords(self, conn, new_items: list, last_keyword_id: int, version: list) -> tuple[dict, dict]:
+        """
+        Searches the items for every keyword with KEYWORD_MATCHER, updating it first if keywords changed
         :param conn: PostgreSQL database connection
-        :return dictionary with key = user id, value = list of alerts
-        """
-        for item_name, item_obj in self.total_menu.items():
-            item_name = item_name.replace("'", "''")
-
-            # Returns rows from Profile table that have alerts for current item
-            get_alerts_query = '''
-                SELECT *
-                FROM accounts_profile
-                WHERE id IN (
-                    SELECT user_id
-                    FROM accounts_alert
-                    WHERE menu_item_id in (
-                        SELECT id
-                        FROM accounts_menu
-                        WHERE item=%s
-                    )
-                )
-            '''
-
-            rows = db_select(conn, get_alerts_query, item_name)
-
-            # Append users & alerts to users_to_alert dict
-            for row in rows:
-                user_id = row[0]
-                email = str(row[3])
-                receive_email_alerts = row[8]  # == 'True'
-
-                if user_id in self.users_to_alert:
-                    self.users_to_alert[user_id].alerts.append(item_obj)
-                else:
-                    self.users_to_alert[user_id] = User(row, int(user_id), email, receive_email_alerts)
-                    self.users_to_alert[user_id].alerts = [item_obj]
-
-        return self.users_to_alert
-
-    def alert_users(self, conn):
-        """
-        Email users that have alerts for the current day menu
+        :param new_items: names of the items new since the last run
+        :param last_keyword_id: highest keyword id of the last run
+        :param version: current [row count, max id] of KeywordAlert table
+        :return: dictionaries mapping keywords to the items containing them, for every item if keywords were
+        created since the last run (otherwise the same as the second), and for the new items
+        """
+        database = database_key(conn)
+        if not KEYWORD_MATCHER.load(database, version):
+            keywords = db_select(conn, GET_KEYWORDS_QUERY)
+            KEYWORD_MATCHER.update(database, version, [row[0] for row in keywords])
+
+        new_matches = KEYWORD_MATCHER.match(new_items)
+        matches = KEYWORD_MATCHER.match(self.total_menu) if version[1] > last_keyword_id else new_matches
+        return matches, new_matches
+
+    def iter_alerts(self, conn):
+        """
+        Streams the users receiving email alerts with alerts or keywords for the current menu, one at a time in
+        user id order, leaving out the items they were already sent on the menu's date
+        Only what changed since the last run of the date is computed: the items new to the menu for every alert
+        and keyword, and every item for the alerts and keywords created since, so a run with nothing new costs one
+        query. The users are read through a server-side cursor, so memory does not grow with the number of users
+        and the first one can be alerted before the rest are read
+        The cursor is held across commits, so the alerts sent can be recorded while iterating
+        :param conn: PostgreSQL database connection, not used by anything else until the generator is exhausted
+        :return: generator of User objects, with their alerts in menu order
+        """
+        alert_run = db_select(conn, GET_ALERT_RUN_QUERY, self.date)
+        if not alert_run:  # query failed
+            return
+        new_items, last_alert_id, last_keyword_id = self._start_alert_run(alert_run[0])
+        max_alert_id, keyword_count, max_keyword_id = alert_run[0][3:]
+        if not new_items and max_alert_id <= last_alert_id and max_keyword_id <= last_keyword_id:
+            return
+
+        matches, new_matches = {}, {}
+        if new_items or max_keyword_id > last_keyword_id:
+            matches, new_matches = self._match_keywords(conn, new_items, last_keyword_id,
+                                                        [keyword_count, max_keyword_id])
+        position = {item: index for index, item in enumerate(self.total_menu)}
+
+        try:
+            with conn.cursor(name='alert_recipients', withhold=True) as cur:
+                cur.itersize = RECIPIENT_FETCH_SIZE
+                cur.execute(STREAM_ALERTS_QUERY, (self.date, list(self.total_menu), new_items, last_alert_id,
+                                                  last_keyword_id, list(matches)))
+                for row in cur:
+                    user_obj = self._get_alert_bundle(row, matches, new_matches, position)
+                    if user_obj.alerts:
+                        yield user_obj
+        except Exception as e:
+            conn.rollback()
+            self._alert_run = None  # not every user was read, so the run must be computed again
+            print("Query execution unsuccessful: {0}".format(e))
+
+    def _get_alert_bundle(self, row, matches: dict, new_matches: dict, position: dict):
+        """
+        :param row: row of STREAM_ALERTS_QUERY
+        :param matches: dictionary mapping each keyword found in the menu to the items containing it
+        :param new_matches: same as matches, for the new items only
+        :param position: dictionary mapping each item of total_menu to its index
+        :return: User object of the row, with the Item objects of its alerts and keywords that were not sent yet
+        """
+        user_id, email, receive_email_alerts, token, items, keywords, new, sent = row
+
+        items = set(items or [])
+        for keyword, is_new in zip(keywords or [], new or []):
+            items.update(matches[keyword] if is_new else new_matches.get(keyword, []))
+        items.difference_update(sent)
+
+        user_obj = User(row[:4], int(user_id), str(email), receive_email_alerts, token)
+        user_obj.alerts = [self.total_menu[item] for item in sorted(items, key=position.get)]
+        return user_obj
+
+    def _start_alert_run(self, row) -> tuple[list, int, int]:
+        """
+        Keeps what this run computes alerts for, saved by save_alert_run() once they are sent
+        :param row: row of GET_ALERT_RUN_QUERY
+        :return: names of the items new since the last run of the date, and the highest alert and keyword ids
+        of that run (0 on the first run)
+        """
+        items, last_alert_id, last_keyword_id, max_alert_id, keyword_count, max_keyword_id = row
+        items = set(items or [])
+        new_items = [item for item in self.total_menu if item not in items]
+
+        self._alert_run = None  # already saved if nothing is new
+        if new_items or max_alert_id != last_alert_id or max_keyword_id != last_keyword_id:
+            self._alert_run = (items | set(self.total_menu), max_alert_id, max_keyword_id)
+        return new_items, last_alert_id or 0, last_keyword_id or 0
+
+    def alert_users_streaming(self, conn):
+        """
+        Email users as iter_alerts() streams them, in Mailgun batches of up to MAILGUN_BATCH_SIZE users (see
+        send_alert_batch()), recording the alerts sent after each batch and the run once every user was read
+        (see save_alert_run())
         :param conn: PostgreSQL database connection
-        :return list containing each email alerted and their alert message(s)
+        :return: dictionary with the number of users alerted, the number of Mailgun API calls, and the emails whose
+        alert failed to send
+        """
+        metrics = {'Sent': 0, 'API calls': 0, 'Failed': []}
+        batch = []
+
+        for user_obj in self.iter_alerts(conn):
+            if user_obj.token is None:  # counted as failed, so the next run computes the alert again
+                print("No authentication token for user {0}, alert not sent".format(user_obj.user_id))
+                metrics['Failed'].append(user_obj.email)
+                continue
+            batch.append(user_obj)
+            if len(batch) >= MAILGUN_BATCH_SIZE:
+                self.record_sent_alerts(conn, self._send_batch(batch, metrics))
+                batch = []
+
+        users_sent = self._send_batch(batch, metrics) if batch else []
+        self.save_alert_run(conn, users_sent, complete=not metrics['Failed'])
+        return metrics
+
+    def _send_batch(self, users: list, metrics: dict) -> list:
+        """
+        Sends a batch of alerts, adding its results to the metrics of alert_users_streaming()
+        :param users: User objects to email
+        :param metrics: dictionary of 'Sent', 'API calls' and 'Failed'
+        :return: User objects whose alerts were sent
         """
-        alerts_sent = []
+        users_sent, users_failed, calls = send_alert_batch(users)
+        metrics['Sent'] += len(users_sent)
+        metrics['API calls'] += calls
+        metrics['Failed'].extend(user_obj.email for user_obj in users_failed)
+        return users_sent
 
-        for user_id, user_obj in self.users_to_alert.items():
-            if user_obj.receive_email_alerts:
-                token = user_obj.get_auth_token(conn)
-                response = send_alert(user_obj.email, user_obj.get_alert_list(), token)
-                alerts_sent.append([user_obj.email, response.json()])
+    def record_sent_alerts(self, conn, users_sent: list):
+        """
+        Records the items sent to users, so later runs of the date don't send them again
+        :param conn: PostgreSQL database connection
+        :param users_sent: User objects whose alerts were sent
+        """
+        user_ids = [user_obj.user_id for user_obj in users_sent for _ in user_obj.alerts]
+        items = [alert.name for user_obj in users_sent for alert in user_obj.alerts]
+        if items:
+            db_write(conn, SENT_ALERT_INSERT_QUERY, self.date, user_ids, items)
 
-        return alerts_sent
+    def save_alert_run(self, conn, users_sent: list, complete: bool = True):
+        """
+        Records the items sent to users, and what iter_alerts() computed alerts for, so later runs of the date
+        neither send them again nor compute them again. Sent alerts older than ALERT_HISTORY_DAYS are deleted
+        If some alerts failed to send, or a user had no authentication token, the run is not recorded, so the next
+        run computes them again
+        :param conn: PostgreSQL database connection
+        :param users_sent: User objects whose alerts were sent
+        :param complete: false if some alerts failed to send
+        """
+        user_ids = [user_obj.user_id for user_obj in users_sent for _ in user_obj.alerts]
+        items = [alert.name for user_obj in users_sent for alert in user_obj.alerts]
+        oldest = self.date - timedelta(days=ALERT_HISTORY_DAYS)
+        if not items and self._alert_run is None:  # nothing to record
+            return
+
+        cur = conn.cursor()
+        try:
+            if items:
+                cur.execute(SENT_ALERT_INSERT_QUERY, (self.date, user_ids, items))
+            if complete and self._alert_run is not None:
+                run_items, last_alert_id, last_keyword_id = self._alert_run
+                cur.execute(ALERT_RUN_UPSERT_QUERY,
+                            (self.date, Json(sorted(run_items)), last_alert_id, last_keyword_id))
+            cur.execute('DELETE FROM accounts_sentalert WHERE date < %s', (oldest,))
+            cur.execute('DELETE FROM accounts_alertrun WHERE date < %s', (oldest,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print("Query execution unsuccessful: {0}".format(e))
+        cur.close()
 
     def __str__(self):
         """
@@ -229,6 +749,49 @@ class Menu:
         return out
 
 
+class MenuDiff:
+    """
+    Change set of a day's menu between two states of Daily Menu table, for stages that only need what changed
+
+    Attributes
+    __________
+    date : date
+        date of the menu
+    added : {str}
+        items that were not on the menu before
+    removed : {str}
+        items that are no longer on the menu
+    changed : {str}
+        items still on the menu, but served at different dining halls
+
+    Methods
+    _________
+    as_dict()
+        Returns the number of items added, removed and changed
+    """
+
+    def __init__(self, day: date, before: dict, after: dict):
+        """
+        Initializes MenuDiff object
+        :param day: date of the menu
+        :param before: dictionary mapping stored items to their menu item id and hall bitmask, before the write
+        :param after: dictionary mapping stored items to their menu item id and hall bitmask, after the write
+        """
+        self.date = day
+        self.added = after.keys() - before.keys()
+        self.removed = before.keys() - after.keys()
+        self.changed = {item for item in after.keys() & before.keys() if after[item][1] != before[item][1]}
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def as_dict(self) -> dict:
+        """
+        :return: number of items added, removed and changed
+        """
+        return {'Added': len(self.added), 'Removed': len(self.removed), 'Changed': len(self.changed)}
+
+
 class Item:
     """
     Represents a menu item and dining halls associated with it
@@ -273,6 +836,8 @@ class User:
         user id stored in the database
     email : str
         user email
+    token : str
+        Django REST authentication token of the user, None if the user has none
     alerts : [Item]
         list of Item objects that the user should receive an alert for
     receive_email_alerts : bool
@@ -282,20 +847,20 @@ class User:
     _________
     get_alert_list()
         get the list of alert messages for user
-    get_auth_token(conn)
-        Get the user's authentication token
     """
 
-    def __init__(self, info: object, user_id: int, email: str, receive_email_alerts: bool):
+    def __init__(self, info: object, user_id: int, email: str, receive_email_alerts: bool, token: str = None):
         """
         Initializes User object
         :param info: any information pertaining to user, returned by database
+        :param token: authentication token, if it was read with the user
         """
         self.info = info
         self.user_id = user_id
         self.email = email
         self.alerts = []
         self.receive_email_alerts = receive_email_alerts
+        self.token = token
 
     def get_alert_list(self):
         """
@@ -307,22 +872,6 @@ class User:
 
         return alert_list
 
-    def get_auth_token(self, conn):
-        """
-        Get the user's authentication token
-        :param conn: PostgreSQL database connection
-        :return: Django REST authentication token for user
-        """
-        get_token_query = '''
-            SELECT key
-            FROM authtoken_token
-            WHERE user_id=%s
-        '''
-
-        rows = db_select(conn, get_token_query, self.user_id)
-
-        return rows[0][0]
-
     def __str__(self):  # use this to alert user by email/sms later?
         """
         Returns the alert(s) for the user
@@ -0,0 +1,223 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+# Constants for requesting pages
+CONNECT_TIMEOUT = 5  # seconds to wait for a connection to the dining hall website
+READ_TIMEOUT = 30  # seconds to wait between bytes of the response
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+MAX_CONCURRENT_REQUESTS = 6  # max requests to the dining hall website in flight at once
+MAX_ATTEMPTS = 3  # attempts per page before giving up on it
+BACKOFF_BASE = 0.5  # seconds, doubled after each failed attempt
+BACKOFF_MAX = 8  # seconds, upper bound of the wait between attempts
+BREAKER_THRESHOLD = 5  # consecutive failures before requests to a host are stopped
+BREAKER_COOLDOWN = 60  # seconds before a stopped host is tried again
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a host that has been failing
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a host after it fails several times in a row, until a cooldown has passed
+    One request is let through after the cooldown, closing the circuit again if it succeeds
+
+    Attributes
+    __________
+    threshold : int
+        consecutive failures before the circuit of a host opens
+    cooldown : float
+        seconds an open circuit waits before letting a request through
+
+    Methods
+    _________
+    allow(host)
+        Returns true if a request to the host may be sent
+    record_success(host)
+        Closes the circuit of the host
+    record_failure(host)
+        Counts a failure of the host, opening its circuit at the threshold
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        """
+        Initializes CircuitBreaker object
+        :param threshold: consecutive failures before the circuit of a host opens
+        :param cooldown: seconds an open circuit waits before letting a request through
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}  # host -> consecutive failures
+        self._opened_at = {}  # host -> time its circuit opened
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """
+        :param host: host of the request
+        :return: true if the circuit of the host is closed, or its cooldown has passed
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at >= self.cooldown:
+                # Half-open: let one request through, re-opening the circuit until it reports back
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, host: str):
+        """
+        Closes the circuit of the host
+        :param host: host of the request
+        """
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str):
+        """
+        Counts a failure of the host, opening its circuit at the threshold
+        :param host: host of the request
+        """
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.threshold:
+                self._opened_at[host] = time.monotonic()
+
+
+class FetchMetrics:
+    """
+    Records how a page request went
+
+    Attributes
+    __________
+    attempts : int
+        number of requests sent
+    latency : float
+        seconds from the first attempt to the final response or error, including waits between attempts
+    status : int
+        HTTP status of the final response, None if there was none
+    error : str
+        description of the final error, None if the page was fetched
+
+    Methods
+    _________
+    as_dict()
+        Returns the metrics as a dictionary
+    """
+
+    def __init__(self):
+        """
+        Initializes FetchMetrics object
+        """
+        self.attempts = 0
+        self.latency = 0.0
+        self.status = None
+        self.error = None
+
+    def as_dict(self) -> dict:
+        """
+        :return: dictionary of the metrics, latency rounded to milliseconds
+        """
+        return {'attempts': self.attempts, 'latency': round(self.latency, 3), 'status': self.status,
+                'error': self.error}
+
+
+# Shared by every request of the process, so it persists across warm invocations
+BREAKER = CircuitBreaker()
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """
+    Creates an HTTP session that keeps its connections to the dining hall website alive between requests
+    :param pool_size: max number of connections kept open at once
+    :return: requests session
+    """
+    session = requests.Session()
+    session.verify = False
+
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+def backoff(attempt: int) -> float:
+    """
+    :param attempt: number of attempts made so far
+    :return: seconds to wait before the next attempt, exponential with full jitter
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def is_successful(response: requests.Response, headers: dict = None) -> bool:
+    """
+    :param response: response to a request for a page
+    :param headers: headers the request was sent with
+    :return: true if the response is 2xx, or 304 to a conditional request
+    """
+    if response.status_code == 304:
+        return any(header in (headers or {}) for header in CONDITIONAL_HEADERS)
+    return 200 <= response.status_code < 300
+
+
+def fetch_page(session, url: str, headers: dict = None, timeout=REQUEST_TIMEOUT, metrics: FetchMetrics = None,
+               breaker: CircuitBreaker = BREAKER, max_attempts: int = MAX_ATTEMPTS) -> requests.Response:
+    """
+    Requests a page, retrying connection errors, timeouts and server errors with jittered exponential backoff
+    Any other response that is not 2xx fails without retrying, except 304 to a conditional request
+    :param session: requests.Session to send the request with
+    :param url: url of the page
+    :param headers: optional request headers
+    :param timeout: (connect, read) timeout in seconds
+    :param metrics: optional FetchMetrics object to record the attempts and latency in
+    :param breaker: circuit breaker for the url's host
+    :param max_attempts: attempts before giving up
+    :return: response of the last attempt
+    :raises CircuitOpenError: if the host's circuit is open
+    :raises requests.RequestException: if the last attempt failed or the page could not be found
+    """
+    metrics = metrics or FetchMetrics()
+    host = urlparse(url).netloc
+    start = time.monotonic()
+
+    try:
+        while True:
+            if not breaker.allow(host):
+                raise CircuitOpenError("Too many failures from {0}, not requesting {1}".format(host, url))
+
+            metrics.attempts += 1
+            try:
+                response = session.get(url, headers=headers, timeout=timeout)
+                metrics.status = response.status_code
+                if response.status_code in RETRY_STATUSES:
+                    response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                breaker.record_failure(host)
+                if metrics.attempts >= max_attempts:
+                    raise
+                print("Attempt {0} for {1} failed, retrying: {2}".format(metrics.attempts, url, e))
+                time.sleep(backoff(metrics.attempts))
+            else:
+                breaker.record_success(host)
+                if not is_successful(response, headers):
+                    raise requests.HTTPError("{0} Error for url: {1}".format(response.status_code, url),
+                                             response=response)
+                return response
+
+    except Exception as e:
+        metrics.error = "{0}: {1}".format(type(e).__name__, e)
+        raise
+
+    finally:
+        metrics.latency = time.monotonic() - start
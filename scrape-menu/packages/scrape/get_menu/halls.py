@@ -0,0 +1,55 @@
+from db import db_select
+
+# Constants for dining hall info
+SOUTH = "South"
+YAHENTAMITSI = "Yahentamitsi"
+TWO_FIFTY_ONE = "251"
+
+
+class Hall:
+    """
+    A dining hall from the registry (accounts_dininghall)
+
+    Attributes
+    __________
+    name : str
+        name of the dining hall
+    location_num : int
+        identifier used by the dining hall website
+    bit : int
+        position of the dining hall in the Daily Menu dining_halls bitmask
+    """
+
+    def __init__(self, name: str, location_num: int, bit: int):
+        """
+        Initializes Hall object
+        :param name: name of the dining hall
+        :param location_num: identifier used by the dining hall website
+        :param bit: position of the dining hall in the Daily Menu dining_halls bitmask
+        """
+        self.name = name
+        self.location_num = location_num
+        self.bit = bit
+
+
+# Registry used when there is no database to read it from, e.g. when recording pages offline
+DEFAULT_HALLS = [Hall(YAHENTAMITSI, 19, 0), Hall(SOUTH, 16, 1), Hall(TWO_FIFTY_ONE, 51, 2)]
+
+
+def load_halls(conn, include_inactive: bool = False) -> list[Hall]:
+    """
+    Loads the dining halls to scrape from the registry
+    :param conn: PostgreSQL database connection
+    :param include_inactive: true to also load dining halls that are no longer scraped
+    :return: list of Hall objects, ordered by bit
+    """
+    get_halls_query = '''
+        SELECT name, location_num, bit
+        FROM accounts_dininghall
+        WHERE is_active OR %s
+        ORDER BY bit
+    '''
+
+    rows = db_select(conn, get_halls_query, include_inactive)
+
+    return [Hall(row[0], row[1], row[2]) for row in rows]
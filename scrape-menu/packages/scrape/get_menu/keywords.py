@@ -0,0 +1,286 @@
+from collections import deque
+from snapshot import delete_snapshot, read_snapshot, snapshot_path, write_snapshot
+
+SNAPSHOT_PATH = snapshot_path('keyword_automaton.json')
+
+# Keywords only match whole words, so "ham" alerts for "Honey Glazed Ham" but not "Graham Crackers"
+WORD_CHARACTERS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+
+GET_KEYWORDS_QUERY = '''
+    SELECT DISTINCT keyword
+    FROM accounts_keywordalert
+'''
+
+
+def normalize(text: str) -> str:
+    """
+    :param text: menu item or keyword
+    :return: text lowercase with its whitespace collapsed, the form keywords are stored in (see KeywordAlert)
+    """
+    return ' '.join(text.lower().split())
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton finding every keyword in a text with one pass over it, however many keywords there are
+    Keywords are kept in a trie, with each node linking to the node of its longest proper suffix in the trie (fail)
+    and to the nearest such suffix ending a keyword (output), so matching never goes back in the text
+    Keywords can be added and removed without rebuilding the trie, only the links are recomputed by build()
+
+    Attributes
+    __________
+    keywords : set[str]
+        normalized keywords in the automaton
+
+    Methods
+    _________
+    add(keyword)
+        Adds a keyword to the trie
+    remove(keyword)
+        Removes a keyword from the trie, leaving its nodes until the trie is compacted
+    build()
+        Recomputes the links of the trie, call after adding or removing keywords
+    find(text)
+        Returns the keywords appearing in text as whole words
+    """
+
+    def __init__(self, keywords=()):
+        """
+        Initializes KeywordAutomaton object, built from keywords
+        :param keywords: iterable of normalized keywords
+        """
+        self.keywords = set()
+        self._goto = [{}]  # per node, dictionary mapping a character to the child node
+        self._fail = [0]
+        self._output = [0]
+        self._keyword = [None]  # keyword ending at each node, None if none does
+        self._removed = 0  # keywords removed since the trie was last compacted
+
+        for keyword in keywords:
+            self.add(keyword)
+        self.build()
+
+    def add(self, keyword: str):
+        """
+        Adds a keyword to the trie, call build() before matching
+        :param keyword: normalized keyword
+        """
+        node = 0
+        for character in keyword:
+            child = self._goto[node].get(character)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][character] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(0)
+                self._keyword.append(None)
+            node = child
+
+        self._keyword[node] = keyword
+        self.keywords.add(keyword)
+
+    def remove(self, keyword: str):
+        """
+        Removes a keyword, call build() before matching
+        Its nodes stay in the trie, which is rebuilt once more keywords have been removed than are left
+        :param keyword: normalized keyword
+        """
+        if keyword not in self.keywords:
+            return
+
+        node = 0
+        for character in keyword:
+            node = self._goto[node][character]
+        self._keyword[node] = None
+        self.keywords.discard(keyword)
+        self._removed += 1
+
+        if self._removed > len(self.keywords):
+            compacted = KeywordAutomaton(self.keywords)
+            self._goto, self._fail, self._output, self._keyword = (compacted._goto, compacted._fail,
+                                                                   compacted._output, compacted._keyword)
+            self._removed = 0
+
+    def build(self):
+        """
+        Recomputes the fail and output links of every node, breadth first so a node's suffixes are linked before it
+        """
+        nodes = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output[child] = 0
+            nodes.append(child)
+
+        while nodes:
+            node = nodes.popleft()
+            for character, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and character not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(character, 0)
+
+                self._fail[child] = fail
+                self._output[child] = fail if self._keyword[fail] is not None else self._output[fail]
+                nodes.append(child)
+
+    def find(self, text: str) -> set[str]:
+        """
+        :param text: normalized text, e.g. a menu item
+        :return: keywords appearing in text as whole words
+        """
+        found = set()
+        node = 0
+
+        for end, character in enumerate(text, 1):
+            while node and character not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(character, 0)
+
+            match = node if self._keyword[node] is not None else self._output[node]
+            while match:
+                keyword = self._keyword[match]
+                start = end - len(keyword)
+                if ((start == 0 or text[start - 1] not in WORD_CHARACTERS)
+                        and (end == len(text) or text[end] not in WORD_CHARACTERS)):
+                    found.add(keyword)
+                match = self._output[match]
+
+        return found
+
+    def to_dict(self) -> dict:
+        """
+        :return: JSON serializable state of the automaton
+        """
+        return {'goto': self._goto, 'fail': self._fail, 'output': self._output, 'keyword': self._keyword,
+                'removed': self._removed}
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        """
+        :param state: state returned by to_dict()
+        :return: KeywordAutomaton object with that state, already built
+        """
+        automaton = cls()
+        automaton._goto = state['goto']
+        automaton._fail = state['fail']
+        automaton._output = state['output']
+        automaton._keyword = state['keyword']
+        automaton._removed = state['removed']
+        automaton.keywords = {keyword for keyword in automaton._keyword if keyword is not None}
+        return automaton
+
+
+class KeywordMatcher:
+    """
+    Process-wide cache of the automaton of every distinct keyword in KeywordAlert table
+    Kept in memory and in a /tmp snapshot between warm invocations, and checked against the row count and max id
+    of KeywordAlert table before use, which change whenever a keyword is saved or deleted. When keywords were
+    saved or deleted since, the cached automaton is updated in place with only the difference rather than rebuilt
+    from scratch
+
+    Attributes
+    __________
+    automaton : KeywordAutomaton
+        automaton of the keywords
+    snapshot_path : str
+        file the automaton is saved to, None to keep it in memory only
+
+    Methods
+    _________
+    load(database, version)
+        Fills the cache from memory or the snapshot, returning whether it is up to date
+    update(database, version, keywords)
+        Adds and removes the keywords that changed, saving the automaton to the snapshot
+    match(items)
+        Returns the items containing each keyword
+    clear()
+        Empties the cache and deletes the snapshot
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH):
+        """
+        Initializes KeywordMatcher object, empty until the first load
+        :param snapshot_path: file the automaton is saved to, None to keep it in memory only
+        """
+        self.automaton = KeywordAutomaton()
+        self.snapshot_path = snapshot_path
+        self._database = None
+        self._version = None
+
+    def load(self, database: str, version: list) -> bool:
+        """
+        Fills the cache from the snapshot unless the automaton in memory is up to date
+        An outdated snapshot of the same database is still used when memory is empty (cold start), as the base
+        of update()
+        :param database: key of the database of KeywordAlert table (see menu_items.database_key)
+        :param version: current [row count, max id] of KeywordAlert table
+        :return: true if the automaton matches version, false if update() must be called with the keywords
+        """
+        if self._database == database and self._version == version:
+            return True
+
+        snapshot = read_snapshot(self.snapshot_path)
+        if (snapshot is not None and snapshot.get('database') == database
+                and (self._database != database or snapshot.get('version') == version)):
+            self.automaton = KeywordAutomaton.from_dict(snapshot['automaton'])
+            self._database = database
+            self._version = snapshot.get('version')
+        elif self._database != database:
+            self.automaton = KeywordAutomaton()
+            self._database = database
+            self._version = None
+
+        return self._version == version
+
+    def update(self, database: str, version: list, keywords):
+        """
+        Brings the automaton up to date with the keywords of KeywordAlert table, only adding the new ones and
+        removing the deleted ones before relinking the trie
+        :param database: key of the database of KeywordAlert table
+        :param version: [row count, max id] of KeywordAlert table the keywords were read at
+        :param keywords: iterable of every distinct keyword in KeywordAlert table
+        """
+        if self._database != database:
+            self.automaton = KeywordAutomaton()
+
+        keywords = set(keywords)
+        added = keywords - self.automaton.keywords
+        removed = self.automaton.keywords - keywords
+        for keyword in removed:
+            self.automaton.remove(keyword)
+        for keyword in added:
+            self.automaton.add(keyword)
+        if added or removed:
+            self.automaton.build()
+
+        self._database = database
+        self._version = version
+        write_snapshot(self.snapshot_path, {'database': database, 'version': version,
+                                            'automaton': self.automaton.to_dict()}, 'keyword cache')
+
+    def match(self, items) -> dict:
+        """
+        :param items: iterable of item names
+        :return: dictionary mapping each keyword found to the items containing it, in the order of items
+        """
+        matches = {}
+        if not self.automaton.keywords:
+            return matches
+
+        for item in items:
+            for keyword in self.automaton.find(normalize(item)):
+                matches.setdefault(keyword, []).append(item)
+        return matches
+
+    def clear(self):
+        """
+        Empties the cache and deletes the snapshot, so it is rebuilt on next use
+        """
+        self.automaton = KeywordAutomaton()
+        self._database = None
+        self._version = None
+        delete_snapshot(self.snapshot_path)
+
+
+KEYWORD_MATCHER = KeywordMatcher()  # shared by every invocation in the process
@@ -0,0 +1,172 @@
+import hashlib
+import json
+from snapshot import delete_snapshot, read_snapshot, snapshot_path, write_snapshot
+
+SNAPSHOT_PATH = snapshot_path('menu_item_ids.json')
+
+# Inserts the items missing from Menu table, returning the id of every item (existing ones are read in the same
+# statement, since ON CONFLICT DO NOTHING only returns inserted rows)
+MENU_UPSERT_QUERY = '''
+    WITH new_items AS (
+        INSERT INTO accounts_menu (item)
+        SELECT unnest(%s::text[])
+        ON CONFLICT (item) DO NOTHING
+        RETURNING id, item
+    )
+    SELECT id, item FROM new_items
+    UNION ALL
+    SELECT id, item FROM accounts_menu WHERE item = ANY(%s)
+'''
+
+# Changes whenever an item is inserted or deleted, so a stale cache is noticed with one cheap query
+MENU_VERSION_QUERY = '''
+    SELECT count(*), coalesce(max(id), 0)
+    FROM accounts_menu
+'''
+
+
+def database_key(conn) -> str:
+    """
+    :param conn: PostgreSQL database connection
+    :return: hash identifying the database of the connection
+    """
+    params = {key: getattr(conn.info, key) for key in ('host', 'port', 'dbname', 'user')}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class MenuItemIds:
+    """
+    Process-wide cache of the Menu table, mapping item names to their ids
+    Kept in memory and in a /tmp snapshot between warm invocations, so only items that were never seen before
+    cost a database write. The cache is checked against the row count and max id of the Menu table before use,
+    and reloaded in one query if items were deleted or inserted by another writer
+    New ids are only added to the cache once the transaction that inserted them commits
+
+    Attributes
+    __________
+    ids : {str : int}
+        dictionary mapping item names to their id in Menu table
+    snapshot_path : str
+        file the cache is saved to, None to keep it in memory only
+
+    Methods
+    _________
+    load(cur)
+        Fills the cache from memory, the snapshot or the Menu table, whichever is up to date
+    upsert(cur, items)
+        Returns the ids of items, inserting the ones missing from Menu table
+    commit()
+        Keeps the ids inserted since the last commit, saving them to the snapshot
+    rollback()
+        Forgets the ids inserted since the last commit
+    clear()
+        Empties the cache and deletes the snapshot, so it is reloaded
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH):
+        """
+        Initializes MenuItemIds object, empty until the first load
+        :param snapshot_path: file the cache is saved to, None to keep it in memory only
+        """
+        self.ids = {}
+        self.snapshot_path = snapshot_path
+        self._database = None
+        self._version = None
+        self._pending = {}
+        self._pending_version = None
+
+    def load(self, cur):
+        """
+        Fills the cache from memory, the snapshot or with one query on the Menu table, whichever matches the
+        current version of the Menu table in the cursor's database
+        :param cur: cursor of a PostgreSQL database connection
+        """
+        database = database_key(cur.connection)
+        cur.execute(MENU_VERSION_QUERY)
+        version = list(cur.fetchone())
+
+        if self._database == database and self._version == version:
+            return
+
+        self.ids = self._read_snapshot(database, version)
+        if self.ids is None:
+            cur.execute('SELECT id, item FROM accounts_menu')
+            self.ids = {item: menu_item_id for menu_item_id, item in cur.fetchall()}
+            self._write_snapshot(database, version)
+
+        self._database = database
+        self._version = version
+        self._pending = {}
+        self._pending_version = None
+
+    def upsert(self, cur, items) -> dict:
+        """
+        Inserts the items missing from the cache to Menu table, within the cursor's transaction
+        :param cur: cursor of a PostgreSQL database connection
+        :param items: iterable of item names
+        :return: dictionary mapping each item to its id in Menu table
+        """
+        if not self._pending:  # otherwise already loaded in this transaction, which changed the version since
+            self.load(cur)
+
+        missing = sorted({item for item in items if item not in self.ids and item not in self._pending})
+        if missing:
+            cur.execute(MENU_UPSERT_QUERY, (missing, missing))
+            self._pending.update((item, menu_item_id) for menu_item_id, item in cur.fetchall())
+            cur.execute(MENU_VERSION_QUERY)
+            self._pending_version = list(cur.fetchone())
+
+        return {item: self.ids[item] if item in self.ids else self._pending[item] for item in items}
+
+    def commit(self):
+        """
+        Keeps the ids inserted since the last commit, call after the transaction commits
+        """
+        if self._pending:
+            self.ids.update(self._pending)
+            self._version = self._pending_version
+            self._pending = {}
+            self._pending_version = None
+            self._write_snapshot(self._database, self._version)
+
+    def rollback(self):
+        """
+        Forgets the ids inserted since the last commit, call after the transaction rolls back
+        Since a failed write may have been caused by a stale id (e.g. an item deleted from the admin site),
+        the whole cache is reloaded on next use
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Empties the cache and deletes the snapshot, so it is reloaded on next use
+        """
+        self.ids = {}
+        self._pending = {}
+        self._database = None
+        self._version = None
+        self._pending_version = None
+        delete_snapshot(self.snapshot_path)
+
+    def _read_snapshot(self, database: str, version: list):
+        """
+        :param database: key of the database the snapshot must belong to
+        :param version: current [row count, max id] of the Menu table
+        :return: dictionary mapping item names to ids, None if there is no up to date snapshot
+        """
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is None or snapshot.get('database') != database or snapshot.get('version') != version:
+            return None
+        return snapshot['ids']
+
+    def _write_snapshot(self, database: str, version: list):
+        """
+        Saves the cache to the snapshot
+        :param database: key of the database the ids belong to
+        :param version: [row count, max id] of the Menu table the ids were read at
+        """
+        write_snapshot(self.snapshot_path, {'database': database, 'version': version, 'ids': self.ids},
+                       'menu item cache')
+
+
+MENU_ITEM_IDS = MenuItemIds()  # shared by every write in the process
@@ -0,0 +1,92 @@
+import hashlib
+from datetime import date
+from db import db_select, db_write
+
+
+class CachedPage:
+    """
+    Validators of a dining hall's menu page from the last time it was fetched
+
+    Attributes
+    __________
+    etag : str
+        ETag header of the page, empty if the website did not send one
+    last_modified : str
+        Last-Modified header of the page, empty if the website did not send one
+    content_hash : str
+        SHA-256 hex digest of the page
+
+    Methods
+    _________
+    request_headers()
+        Returns the headers that make a request for the page conditional
+    """
+
+    def __init__(self, etag: str, last_modified: str, content_hash: str):
+        """
+        Initializes CachedPage object
+        :param etag: ETag header of the page
+        :param last_modified: Last-Modified header of the page
+        :param content_hash: SHA-256 hex digest of the page
+        """
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+
+    def request_headers(self) -> dict:
+        """
+        :return: If-None-Match / If-Modified-Since headers for the cached validators
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def hash_page(page: bytes) -> str:
+    """
+    :param page: HTML of a menu page
+    :return: SHA-256 hex digest of the page
+    """
+    return hashlib.sha256(page).hexdigest()
+
+
+def load_page_cache(conn, day: date = None) -> dict:
+    """
+    Loads the cached validators of every menu page fetched for a day
+    :param conn: PostgreSQL database connection
+    :param day: date of the menus, defaults to today
+    :return: dictionary mapping location numbers to CachedPage objects
+    """
+    get_pages_query = '''
+        SELECT location_num, etag, last_modified, content_hash
+        FROM accounts_menupage
+        WHERE date=%s
+    '''
+
+    rows = db_select(conn, get_pages_query, day or date.today())
+
+    return {row[0]: CachedPage(row[1], row[2], row[3]) for row in rows}
+
+
+def save_page_cache(conn, dining_halls, day: date = None):
+    """
+    Stores the validators of each dining hall's fetched menu page, replacing the ones cached for the day
+    :param conn: PostgreSQL database connection
+    :param dining_halls: list of fetched DiningHall objects
+    :param day: date of the menus, defaults to today
+    """
+    menu_page_upsert_query = '''
+        INSERT INTO accounts_menupage (location_num, date, etag, last_modified, content_hash, date_fetched)
+        VALUES (%s, %s, %s, %s, %s, now())
+        ON CONFLICT (location_num, date) DO UPDATE
+        SET etag=EXCLUDED.etag, last_modified=EXCLUDED.last_modified,
+            content_hash=EXCLUDED.content_hash, date_fetched=EXCLUDED.date_fetched
+    '''
+
+    for dining_hall in dining_halls:
+        if dining_hall.content_hash is not None:
+            db_write(conn, menu_page_upsert_query, dining_hall.location_num, day or date.today(),
+                     dining_hall.etag, dining_hall.last_modified, dining_hall.content_hash)
@@ -0,0 +1,116 @@
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Constants for web scraping
+MENU_TAG = "a"
+MENU_CLASS = "menu-item-name"
+DEFAULT_ENCODING = "utf-8"
+
+
+class MenuItemExtractor(HTMLParser):
+    """
+    Event-driven parser that collects the text of menu item anchors as the page streams through it,
+    without building a document tree
+
+    Attributes
+    __________
+    items : set[str]
+        menu items found so far
+
+    Methods
+    _________
+    handle_starttag(tag, attrs)
+        Starts collecting text when a menu item anchor opens
+    handle_endtag(tag)
+        Saves the collected text when the menu item anchor closes
+    handle_data(data)
+        Collects text inside a menu item anchor
+    """
+
+    def __init__(self):
+        """
+        Initializes the MenuItemExtractor object
+        """
+        super().__init__(convert_charrefs=True)
+        self.items = set()
+        self._text = None  # list of text pieces while inside a menu item anchor, otherwise None
+
+    def handle_starttag(self, tag, attrs):
+        """
+        Starts collecting text when a menu item anchor opens
+        :param tag: name of the tag
+        :param attrs: list of (name, value) pairs of the tag's attributes
+        """
+        if tag != MENU_TAG or self._text is not None:
+            return
+
+        for name, value in attrs:
+            if name == "class" and value and MENU_CLASS in value.split():
+                self._text = []
+                return
+
+    def handle_endtag(self, tag):
+        """
+        Saves the collected text when the menu item anchor closes
+        :param tag: name of the tag
+        """
+        if tag == MENU_TAG and self._text is not None:
+            self.items.add(''.join(self._text))
+            self._text = None
+
+    def handle_data(self, data):
+        """
+        Collects text inside a menu item anchor
+        :param data: text between tags
+        """
+        if self._text is not None:
+            self._text.append(data)
+
+
+def decode_page(page) -> str:
+    """
+    :param page: HTML of a menu page, as bytes or str
+    :return: HTML as str
+    """
+    if isinstance(page, bytes):
+        return page.decode(DEFAULT_ENCODING, errors="replace")
+    return page
+
+
+def parse_stream(page) -> set[str]:
+    """
+    Extracts menu items with the event-driven MenuItemExtractor
+    :param page: HTML of a menu page
+    :return: set of items on the menu
+    """
+    extractor = MenuItemExtractor()
+    extractor.feed(decode_page(page))
+    extractor.close()
+    return extractor.items
+
+
+def parse_strainer(page) -> set[str]:
+    """
+    Extracts menu items with BeautifulSoup, only building the tree for menu item anchors
+    :param page: HTML of a menu page
+    :return: set of items on the menu
+    """
+    strainer = SoupStrainer(MENU_TAG, class_=MENU_CLASS)
+    soup = BeautifulSoup(page, "html.parser", parse_only=strainer)
+    return {line.text for line in soup.find_all(MENU_TAG, class_=MENU_CLASS)}
+
+
+def parse_soup(page) -> set[str]:
+    """
+    Extracts menu items by building the full BeautifulSoup tree of the page
+    Slowest backend, kept as the reference the others are checked against
+    :param page: HTML of a menu page
+    :return: set of items on the menu
+    """
+    soup = BeautifulSoup(page, "html.parser")
+    return {line.text for line in soup.find_all(MENU_TAG, class_=MENU_CLASS)}
+
+
+# Parsing backends by name, parse_menu_items is the one used by the scraper
+PARSERS = {"stream": parse_stream, "strainer": parse_strainer, "soup": parse_soup}
+parse_menu_items = parse_stream
@@ -0,0 +1,67 @@
+import queue
+import threading
+from datetime import date
+from archive import archive_pages
+from dining_hall import DiningHall, Menu, scrape_dining_halls
+from fetch import MAX_CONCURRENT_REQUESTS
+from menu_items import MENU_ITEM_IDS
+
+QUEUE_SIZE = 2  # parsed dining halls waiting for the writer, scrapers pause while it is full
+
+
+def stream_menu(conn, halls: list, cache: dict = None, day: date = None,
+                max_workers: int = MAX_CONCURRENT_REQUESTS) -> tuple[Menu, list[DiningHall]]:
+    """
+    Scrapes the dining halls and writes their menus to the database as a pipeline
+    Scraper threads put each dining hall on a bounded queue as soon as it is parsed, while this thread archives
+    its page and writes its items, so fetching, parsing and writing overlap
+    Each dining hall only writes its difference from the stored Daily Menu rows, so rerunning the same day
+    writes nothing, and dining halls that could not be scraped keep their stored items
+    The changes are available from the returned Menu's get_diff(), and each DiningHall's written tells whether its
+    own were committed
+    :param conn: PostgreSQL database connection, only used from this thread
+    :param halls: list of Hall objects from the registry
+    :param cache: optional dictionary mapping location numbers to CachedPage objects
+    :param day: date of the menus, defaults to today
+    :param max_workers: max number of requests in flight at once
+    :return: combined Menu of the dining halls that were written, and every DiningHall object in the order of halls
+    """
+    parsed = queue.Queue(maxsize=QUEUE_SIZE)
+    scraped = []
+
+    def produce():
+        try:
+            scraped.extend(scrape_dining_halls(halls, cache=cache, day=day, max_workers=max_workers,
+                                               on_parsed=parsed.put))
+        finally:
+            parsed.put(None)  # tells the writer no more dining halls are coming
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+
+    menu = Menu([], day)
+    received_all = False
+    try:
+        # Item ids and the stored menu are loaded while the first pages are being fetched, so each dining hall
+        # only writes its difference from the stored menu
+        with conn.cursor() as cur:
+            MENU_ITEM_IDS.load(cur)
+        menu.load_db_menu(conn)
+
+        while (dining_hall := parsed.get()) is not None:
+            archived = archive_pages(conn, [dining_hall])
+            menu.add_dining_hall(dining_hall)
+            dining_hall.written = menu.update_db_dining_hall(conn, dining_hall) and archived
+            dining_hall.page = None  # only the parsed menu is kept once the page is archived
+        received_all = True
+
+        if menu.dining_halls:
+            menu.prune_db_menu(conn)
+    finally:
+        # Keep draining if loading or writing failed, so no scraper stays blocked on the full queue
+        while not received_all:
+            received_all = parsed.get() is None
+        producer.join()
+
+    return menu, scraped
+
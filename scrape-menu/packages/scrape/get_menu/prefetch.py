@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from psycopg2.extras import execute_values
+from dining_hall import DAILY_MENU_UPSERT_QUERY, DiningHall, Menu, run_dining_halls
+from fetch import MAX_CONCURRENT_REQUESTS, create_session
+from menu_items import MENU_ITEM_IDS
+
+PREFETCH_DAYS = 7  # number of upcoming days fetched by a prefetch
+
+
+def prefetch_menus(halls: list, start: date = None, days: int = PREFETCH_DAYS,
+                   max_workers: int = MAX_CONCURRENT_REQUESTS) -> list[Menu]:
+    """
+    Web-scrapes the menus of every dining hall for a range of days, through one shared session
+    Days on which no dining hall could be scraped are left out
+    :param halls: list of Hall objects from the registry
+    :param start: first date to fetch, defaults to tomorrow
+    :param days: number of days to fetch
+    :param max_workers: max number of requests in flight at once
+    :return: list of combined Menu objects, one per day in date order
+    """
+    start = start or date.today() + timedelta(days=1)
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+
+    dining_halls = {day: [DiningHall(hall.name, hall.location_num, day=day, bit=hall.bit) for hall in halls]
+                    for day in dates}
+
+    with create_session(max_workers) as session:
+        run_dining_halls([dining_hall for day in dates for dining_hall in dining_halls[day]], session,
+                         max_workers=max_workers)
+
+    menus = []
+    for day in dates:
+        if all(dining_hall.error is not None for dining_hall in dining_halls[day]):
+            continue
+
+        menu = Menu(dining_halls[day], day)
+        menu.create_menu()
+        menus.append(menu)
+
+    return menus
+
+
+def write_menus(conn, menus: list[Menu]):
+    """
+    Writes the menus of several days to the database in one transaction
+    New items are inserted to the Menu table and each day's Daily Menu rows are upserted, deleting items that
+    are no longer served
+    Only the bits of the dining halls scraped for a day change, so a dining hall that failed keeps its stored items
+    :param conn: PostgreSQL database connection
+    :param menus: list of combined Menu objects
+    """
+    items = sorted({item for menu in menus for item in menu.total_menu})
+    scraped = {menu.date: menu.get_scraped_mask() for menu in menus}
+
+    daily_menu_select_query = '''
+        SELECT menu_item_id, date, dining_halls
+        FROM accounts_dailymenu
+        WHERE date = ANY(%s)
+    '''
+
+    daily_menu_delete_query = '''
+        DELETE FROM accounts_dailymenu
+        WHERE date = ANY(%s)
+            AND (menu_item_id, date) NOT IN (SELECT * FROM unnest(%s::integer[], %s::date[]))
+    '''
+
+    cur = conn.cursor()
+    try:
+        menu_item_ids = MENU_ITEM_IDS.upsert(cur, items)
+
+        # Keeps the bits of the dining halls that were not scraped, and replaces those of the others
+        cur.execute(daily_menu_select_query, (list(scraped),))
+        masks = {(menu_item_id, day): mask & ~scraped[day] for menu_item_id, day, mask in cur.fetchall()}
+        for menu in menus:
+            for menu_item_id, day, mask in menu.get_daily_menu_rows(menu_item_ids):
+                masks[(menu_item_id, day)] = masks.get((menu_item_id, day), 0) | mask
+        rows = [(menu_item_id, day, mask) for (menu_item_id, day), mask in masks.items() if mask]
+
+        cur.execute(daily_menu_delete_query, (list(scraped), [row[0] for row in rows], [row[1] for row in rows]))
+        execute_values(cur, DAILY_MENU_UPSERT_QUERY, rows, page_size=1000)
+        conn.commit()
+        MENU_ITEM_IDS.commit()
+    except Exception as e:
+        conn.rollback()
+        MENU_ITEM_IDS.rollback()
+        print("Query execution unsuccessful: {0}".format(e))
+
+    cur.close()
@@ -0,0 +1,112 @@
+import argparse
+import gzip
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from archive import iter_snapshots
+from bulk_load import copy_menus
+from db import connect, open_connection
+from dining_hall import DiningHall, Menu
+from halls import load_halls
+
+DAYS_PER_WRITE = 31  # days of menus written to the database per transaction
+PENDING_PER_WORKER = 4  # snapshots handed to each worker process ahead of the one being written
+
+
+def parse_snapshot(snapshot) -> DiningHall:
+    """
+    Decompresses and parses an archived page, run in a worker process
+    :param snapshot: (dining hall name, location number, bit, date, gzip compressed page)
+    :return: parsed DiningHall object, without its page
+    """
+    name, location_num, bit, day, page = snapshot
+
+    dining_hall = DiningHall(name, location_num, day=day, bit=bit)
+    dining_hall.page = gzip.decompress(page)
+    dining_hall.parse()
+    dining_hall.page = None  # only the menu needs to be sent back to the main process
+
+    return dining_hall
+
+
+def reparse(conn, start: date = None, end: date = None, workers: int = None) -> int:
+    """
+    Rebuilds the Menu and Daily Menu tables from the snapshot archive, parsing pages on every CPU core
+    Snapshots are streamed from a server-side cursor on a connection of their own, and only PENDING_PER_WORKER
+    per worker are read ahead of the writer, so memory stays bounded however large the archive is
+    Dates are bulk loaded as soon as all of their pages are parsed, DAYS_PER_WRITE days at a time
+    :param conn: PostgreSQL database connection
+    :param start: first date to rebuild, defaults to the start of the archive
+    :param end: last date to rebuild, defaults to the end of the archive
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :return: number of dates rebuilt
+    """
+    halls = {hall.location_num: hall for hall in load_halls(conn, include_inactive=True)}
+    workers = workers or os.cpu_count()
+
+    # Writes commit on conn, which would close the archive's cursor if it were read over the same connection
+    snapshots_conn = open_connection()
+    snapshots = ((halls[location_num].name, location_num, halls[location_num].bit, day, page)
+                 if location_num in halls else (str(location_num), location_num, None, day, page)
+                 for location_num, day, page in iter_snapshots(snapshots_conn, start, end))
+
+    rebuilt = 0
+    menus = []
+    dining_halls = []
+
+    def flush_day():
+        menu = Menu(dining_halls[:], dining_halls[0].date)
+        menu.create_menu()
+        menus.append(menu)
+        dining_halls.clear()
+
+    def add_dining_hall(dining_hall):
+        nonlocal rebuilt
+        # Snapshots arrive in date order, so a day is complete once the next one starts
+        if dining_halls and dining_halls[0].date != dining_hall.date:
+            flush_day()
+            if len(menus) == DAYS_PER_WRITE:
+                copy_menus(conn, menus)
+                rebuilt += len(menus)
+                menus.clear()
+        dining_halls.append(dining_hall)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Results are taken in submission order, so the dining halls stay in date order
+            pending = deque()
+            for snapshot in snapshots:
+                pending.append(executor.submit(parse_snapshot, snapshot))
+                if len(pending) >= workers * PENDING_PER_WORKER:
+                    add_dining_hall(pending.popleft().result())
+            while pending:
+                add_dining_hall(pending.popleft().result())
+    finally:
+        snapshots_conn.close()
+
+    if dining_halls:
+        flush_day()
+    if menus:
+        copy_menus(conn, menus)
+        rebuilt += len(menus)
+
+    return rebuilt
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Rebuild the menu tables from archived menu pages")
+    arg_parser.add_argument("--start", type=date.fromisoformat, help="first date to rebuild (YYYY-MM-DD)")
+    arg_parser.add_argument("--end", type=date.fromisoformat, help="last date to rebuild (YYYY-MM-DD)")
+    arg_parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of CPUs")
+    args = arg_parser.parse_args()
+
+    conn = connect()
+    rebuilt = reparse(conn, args.start, args.end, args.workers)
+    conn.close()
+
+    print("Rebuilt {0} days of menus".format(rebuilt))
+
+
+if __name__ == "__main__":
+    main()
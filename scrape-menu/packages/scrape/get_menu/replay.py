@@ -0,0 +1,191 @@
+import argparse
+import gzip
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from dining_hall import DiningHall, run_dining_halls
+from fetch import MAX_CONCURRENT_REQUESTS, create_session
+from halls import DEFAULT_HALLS
+
+
+def recording_path(directory, location_num: int, day: date) -> Path:
+    """
+    :param directory: root directory of the recording
+    :param location_num: identifier used by the dining hall website
+    :param day: date of the menu
+    :return: path of the gzipped page, e.g. 2024-06-12/19.html.gz
+    """
+    return Path(directory) / day.isoformat() / "{0}.html.gz".format(location_num)
+
+
+def save_page(directory, location_num: int, day: date, page: bytes):
+    """
+    Compresses a fetched menu page into the recording
+    :param directory: root directory of the recording
+    :param location_num: identifier used by the dining hall website
+    :param day: date of the menu
+    :param page: HTML of the menu page
+    """
+    path = recording_path(directory, location_num, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(gzip.compress(page))
+
+
+def load_recording(directory) -> dict:
+    """
+    Loads every page of a recording into memory
+    :param directory: root directory of the recording
+    :return: dictionary mapping (location number, date) to the HTML of the menu page
+    """
+    pages = {}
+    for path in sorted(Path(directory).glob("*/*.html.gz")):
+        day = date.fromisoformat(path.parent.name)
+        location_num = int(path.name.split(".")[0])
+        pages[(location_num, day)] = gzip.decompress(path.read_bytes())
+    return pages
+
+
+def record(directory, halls: list, start: date, days: int) -> int:
+    """
+    Fetches the live menu pages of the dining halls for a range of days and saves them to a recording
+    :param directory: root directory of the recording
+    :param halls: list of Hall objects
+    :param start: first date to fetch
+    :param days: number of days to fetch
+    :return: number of pages saved
+    """
+    dining_halls = [DiningHall(hall.name, hall.location_num, day=start + timedelta(days=offset))
+                    for offset in range(days) for hall in halls]
+
+    with create_session(MAX_CONCURRENT_REQUESTS) as session:
+        run_dining_halls(dining_halls, session, max_workers=MAX_CONCURRENT_REQUESTS)
+
+    saved = 0
+    for dining_hall in dining_halls:
+        if dining_hall.page is not None:
+            save_page(directory, dining_hall.location_num, dining_hall.date, dining_hall.page)
+            saved += 1
+    return saved
+
+
+class ReplayServer:
+    """
+    Local stand-in for the dining hall website, serving recorded menu pages
+    Use as a context manager, and pass url as the base_url of each DiningHall
+
+    Attributes
+    __________
+    pages : dict
+        dictionary mapping (location number, date) to the HTML of the menu page
+    latency : float
+        seconds each response is delayed by, to imitate the network
+    url : str
+        base url of the server
+
+    Methods
+    _________
+    start()
+        Serves the pages from a background thread
+    stop()
+        Shuts the server down
+    """
+
+    def __init__(self, pages: dict, latency: float = 0.0):
+        """
+        Initializes ReplayServer object, binding it to a free local port
+        :param pages: dictionary mapping (location number, date) to the HTML of the menu page
+        :param latency: seconds each response is delayed by
+        """
+        self.pages = pages
+        self.latency = latency
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = "http://127.0.0.1:{0}".format(self._server.server_address[1])
+
+    def _handler(self):
+        """
+        :return: request handler class that looks pages up in this server
+        """
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real website
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    location_num = int(query["locationNum"][0])
+                    day = datetime.strptime(query["dtdate"][0], "%m/%d/%Y").date()
+                    page = replay.pages[(location_num, day)]
+                except (KeyError, ValueError):
+                    self.send_error(404)
+                    return
+
+                if replay.latency:
+                    time.sleep(replay.latency)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    def start(self):
+        """
+        Serves the pages from a background thread
+        """
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """
+        Shuts the server down
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Record menu pages, or replay a recording on a local server")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="save live menu pages to a recording")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("--start", type=date.fromisoformat, default=date.today(),
+                               help="first date to record (YYYY-MM-DD), defaults to today")
+    record_parser.add_argument("--days", type=int, default=1, help="number of days to record")
+
+    serve_parser = commands.add_parser("serve", help="serve a recording until interrupted")
+    serve_parser.add_argument("directory")
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay each response by")
+
+    args = arg_parser.parse_args()
+
+    if args.command == "record":
+        saved = record(args.directory, DEFAULT_HALLS, args.start, args.days)
+        print("Saved {0} pages to {1}".format(saved, args.directory))
+    else:
+        with ReplayServer(load_recording(args.directory), args.latency) as server:
+            print("Replaying {0} pages at {1}".format(len(server.pages), server.url))
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
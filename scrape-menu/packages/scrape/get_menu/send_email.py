@@ -1,8 +1,26 @@
 import requests
 import os
 import json
+from html import escape
 
-MAILGUN_API = os.environ['MAILGUN_API']
+MAILGUN_API = os.environ.get('MAILGUN_API')
+MAILGUN_BATCH_SIZE = 1000  # most recipients Mailgun accepts in one call
+TEMPLATE = "Alert email 3"
+TEMPLATE_VARIABLES = ("alerts", "account_auth_url", "unsubscribe_url")
+SUBJECT = "You have dining hall alerts!"
+
+
+def get_template_variables(alerts: list[str], token: str) -> dict:
+    """
+    Variables of the alert email template, the same for a single email and a batch (see README, Alert Emails)
+    The alerts are rendered to one HTML string, since recipient variables can only hold text
+    :param alerts: list of user's alerts
+    :param token: user's authentication token
+    :return: variables of the alert email template for the user
+    """
+    return {"alerts": '<br>'.join(escape(alert) for alert in alerts),
+            "account_auth_url": 'https://terpalert.xyz/accounts/auth/' + token,
+            "unsubscribe_url": 'https://terpalert.xyz/accounts/unsubscribe/' + token}
 
 
 def send_alert(to_email: str, alerts: list[str], token: str):
@@ -14,17 +32,68 @@ def send_alert(to_email: str, alerts: list[str], token: str):
     :return: JSON response from Mailgun API
     """
     from_email = "TerpAlert <" + os.environ['MAILGUN_EMAIL'] + ">"
-    template = "Alert email 2"
-    account_auth_url = 'https://terpalert.xyz/accounts/auth/' + token
-    unsubscribe_url = 'https://terpalert.xyz/accounts/unsubscribe/' + token
 
     return requests.post(
         os.environ['MAILGUN_URL'],
         auth=("api", MAILGUN_API),
         data={"from": from_email,
               "to": [to_email],
-              "subject": "You have dining hall alerts!",
-              "template": template,
-              "t:variables": '{"alerts": ' + json.dumps(alerts) + ', "account_auth_url": ' + json.dumps(
-                  account_auth_url) + ', "unsubscribe_url": ' + json.dumps(unsubscribe_url) + '}'
+              "subject": SUBJECT,
+              "template": TEMPLATE,
+              "t:variables": json.dumps(get_template_variables(alerts, token))
+              })
+
+
+def send_alerts(recipients: list[tuple[str, list[str], str]]):
+    """
+    Sends alert emails to up to MAILGUN_BATCH_SIZE users with one call to the Mailgun API
+    Each user's alerts and URLs are passed as recipient variables, so every user gets their own email with only
+    their own alerts, and the template variables refer to them, so the template gets the same variables as
+    send_alert()
+    :param recipients: list of (user's email, list of user's alerts, user's authentication token)
+    :return: JSON response from Mailgun API
+    """
+    from_email = "TerpAlert <" + os.environ['MAILGUN_EMAIL'] + ">"
+    recipient_variables = {to_email: get_template_variables(alerts, token) for to_email, alerts, token in recipients}
+    template_variables = {name: '%recipient.{0}%'.format(name) for name in TEMPLATE_VARIABLES}
+
+    return requests.post(
+        os.environ['MAILGUN_URL'],
+        auth=("api", MAILGUN_API),
+        data={"from": from_email,
+              "to": list(recipient_variables),
+              "subject": SUBJECT,
+              "template": TEMPLATE,
+              "t:variables": json.dumps(template_variables),
+              "recipient-variables": json.dumps(recipient_variables)
               })
+
+
+def send_alert_batch(users: list) -> tuple[list, list, int]:
+    """
+    Emails users their alerts with one Mailgun API call, each user's alerts and URLs passed as recipient variables
+    If Mailgun rejects the batch, e.g. for one invalid address, each user is emailed on their own instead, so only
+    the users whose own email fails are left out
+    :param users: up to MAILGUN_BATCH_SIZE User objects with an authentication token
+    :return: User objects whose alerts were sent, User objects whose alerts failed to send, and number of API calls
+    """
+    try:
+        response = send_alerts([(user_obj.email, user_obj.get_alert_list(), user_obj.token) for user_obj in users])
+        if response.ok:
+            return users, [], 1
+        print("Batch alert unsuccessful: {0} {1}".format(response.status_code, response.text))
+    except requests.RequestException as e:
+        print("Batch alert unsuccessful: {0}".format(e))
+
+    users_sent = []
+    users_failed = []
+    for user_obj in users:
+        try:
+            response = send_alert(user_obj.email, user_obj.get_alert_list(), user_obj.token)
+            sent = response.ok
+        except requests.RequestException as e:
+            print("Alert to user {0} unsuccessful: {1}".format(user_obj.user_id, e))
+            sent = False
+        (users_sent if sent else users_failed).append(user_obj)
+
+    return users_sent, users_failed, 1 + len(users)
@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+
+
+def snapshot_path(name: str) -> str:
+    """
+    :param name: file name of the snapshot
+    :return: path of the snapshot in /tmp, which survives warm invocations
+    """
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def read_snapshot(path: str):
+    """
+    :param path: file of the snapshot, None if the cache is kept in memory only
+    :return: dictionary saved to the snapshot, None if there is none or it can't be read
+    """
+    if path is None:
+        return None
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path: str, snapshot: dict, name: str):
+    """
+    Saves a cache, replacing the snapshot atomically so a concurrent reader never sees half of it
+    :param path: file of the snapshot, None if the cache is kept in memory only
+    :param snapshot: JSON serializable state of the cache
+    :param name: name of the cache, for the error message
+    """
+    if path is None:
+        return
+    try:
+        temp_path = '{0}.{1}'.format(path, os.getpid())
+        with open(temp_path, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print("Saving {0} unsuccessful: {1}".format(name, e))
+
+
+def delete_snapshot(path: str):
+    """
+    :param path: file of the snapshot, None if the cache is kept in memory only
+    """
+    if path is not None and os.path.exists(path):
+        os.remove(path)
@@ -1,15 +1,39 @@
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 
 from config import load_config
 
+_config = None  # database.ini is only read once per process
+_connection = None  # reused by every connect() while it stays healthy
+
+
+def is_healthy(conn):
+    # Ping the connection, ending any transaction left open on it
+    if conn is None or conn.closed:
+        return False
+    try:
+        if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
 
 def connect():
-    # Connect to the PostgreSQL database
-    config = load_config()
+    # Connect to the PostgreSQL database, reusing the previous connection if it still works
+    global _config, _connection
+    if is_healthy(_connection):
+        return _connection
+
     try:
-        with psycopg2.connect(**config) as conn:  # ** ensures arg passed is stored as a dict
-            # print('Connected to the server successfully')
-            return conn
+        if _config is None:
+            _config = load_config()
+        _connection = psycopg2.connect(**_config)  # ** ensures arg passed is stored as a dict
+        # print('Connected to the server successfully')
+        return _connection
     except (psycopg2.DatabaseError, Exception) as e:
         print(e)
 
@@ -1,4 +1,4 @@
-from umd import DiningHall, Menu
+from umd import Menu, scrape_dining_halls
 import db
 
 SOUTH = "South"
@@ -15,11 +15,8 @@ HALLS = {SOUTH: 16, YAHENTAMITSI: 19, TWO_FIFTY_ONE: 51}
 
 
 def main():
-    the_y = DiningHall(name=YAHENTAMITSI, location_num=HALLS[YAHENTAMITSI])
-    south = DiningHall(name=SOUTH, location_num=HALLS[SOUTH])
-    two_fifty_one = DiningHall(name=TWO_FIFTY_ONE, location_num=HALLS[TWO_FIFTY_ONE])
-
-    dining_halls = [the_y, south, two_fifty_one]
+    # Scrape every dining hall concurrently, in the order Yahentamitsi, South, 251
+    dining_halls = scrape_dining_halls({name: HALLS[name] for name in (YAHENTAMITSI, SOUTH, TWO_FIFTY_ONE)})
 
     # process_commands(dining_halls)
     menu = Menu(dining_halls)
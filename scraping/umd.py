@@ -1,5 +1,7 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from db import db_select, db_write
 from datetime import date
 
@@ -7,10 +9,13 @@ from datetime import date
 BASE_URL = "https://nutrition.umd.edu"
 MENU_TAG = "a"
 MENU_CLASS = "menu-item-name"
+REQUEST_TIMEOUT = 30  # seconds to wait on a dining hall's menu page
+DINING_HALL_BITS = {"Yahentamitsi": 0, "South": 1, "251": 2}  # bit of each dining hall in DailyMenu.dining_halls
 
 
 class DiningHall:
     """Stores information pertaining to a dining hall and functionality to web scrape menu data
+    Constructing a DiningHall does no network I/O, the menu is fetched and parsed on first use
 
     Attributes
     __________
@@ -18,19 +23,41 @@ class DiningHall:
         name of the dining hall
     location_num : int
         identifier used by the dining hall website
+    page : bytes
+        raw HTML of the menu page, None until fetched
     menu: set[str]
-        contains items in the menu of the dining hall
+        contains items in the menu of the dining hall, fetched and parsed on first access
+    session : requests.Session
+        HTTP session used to request the menu, shared between dining halls
+    timeout : float
+        seconds to wait on the dining hall website before giving up
     """
 
-    def __init__(self, name: str, location_num: int):
-        """Initializes the DiningHall object and generates menu
+    def __init__(self, name: str, location_num: int, session: requests.Session = None,
+                 timeout: float = REQUEST_TIMEOUT):
+        """Initializes the DiningHall object, without requesting its menu
         :param name: name of the dining hall
         :param location_num: identifier used by the dining hall website
+        :param session: HTTP session to request the menu with, a new connection is made if not given
+        :param timeout: seconds to wait on the dining hall website
         """
         self.name = name
         self.location_num = location_num
+        self.session = session
+        self.timeout = timeout
         self.__url = self.__create_url()
-        self.menu = self.__get_menu()
+        self.page = None
+        self._menu = None
+
+    @property
+    def menu(self) -> set[str]:
+        """Returns the items on the menu, scraping them the first time it is accessed
+
+        :return: set containing each menu item from the dining hall website
+        """
+        if self._menu is None:
+            self.parse()
+        return self._menu
 
     def __create_url(self) -> str:
         """Returns the url to the menu of the dining hall, on the specified date
@@ -43,14 +70,33 @@ class DiningHall:
         return BASE_URL + "/?locationNum=" + str(self.location_num) + "&dtdate=" + str(month) + "/" + str(
             day) + "/" + str(year)
 
-    def __get_menu(self) -> set[str]:
-        """Scrapes each menu item from the dining hall website
+    def fetch(self, session: requests.Session = None) -> bytes:
+        """Requests the menu page of the dining hall, storing its HTML in page
+
+        :param session: HTTP session to request the page with, defaults to the dining hall's session
+        :return: HTML of the menu page
+        """
+        session = session or self.session
+
+        if session is None:
+            response = requests.get(self.__url, timeout=self.timeout)
+        else:
+            response = session.get(self.__url, timeout=self.timeout)
+
+        self.page = response.content
+        self._menu = None  # a new page invalidates the parsed menu
+        return self.page
+
+    def parse(self) -> set[str]:
+        """Extracts each menu item from the fetched page, fetching it first if needed
 
         :return: set containing each menu item from the dining hall website
         """
-        # Set up web scraper
-        page = requests.get(self.__url)
-        soup = BeautifulSoup(page.content, "html.parser")
+        if self.page is None:
+            self.fetch()
+
+        # Only build the tree for menu item anchors, rather than the whole page
+        soup = BeautifulSoup(self.page, "html.parser", parse_only=SoupStrainer(MENU_TAG, class_=MENU_CLASS))
 
         items = set()
 
@@ -58,9 +104,55 @@ class DiningHall:
         for line in soup.find_all(MENU_TAG, class_=MENU_CLASS):
             items.add(line.text)
 
+        self._menu = items
         return items
 
 
+def create_session(pool_size: int) -> requests.Session:
+    """Creates an HTTP session that keeps its connections to the dining hall website alive between requests
+
+    :param pool_size: max number of connections kept open at once
+    :return: requests session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def scrape_dining_halls(halls: dict, timeouts: dict = None) -> list[DiningHall]:
+    """Web-scrapes the menus of every dining hall at the same time, through one shared session
+
+    :param halls: dictionary mapping dining hall names to their location numbers
+    :param timeouts: optional dictionary mapping dining hall names to seconds to wait on their menu
+    :return: list of DiningHall objects, in the same order as halls
+    """
+    timeouts = timeouts or {}
+    dining_halls = [DiningHall(name, location_num, timeout=timeouts.get(name, REQUEST_TIMEOUT))
+                    for name, location_num in halls.items()]
+
+    with create_session(len(dining_halls)) as session:
+        run_dining_halls(dining_halls, session)
+
+    return dining_halls
+
+
+def run_dining_halls(dining_halls: list[DiningHall], session: requests.Session):
+    """Fetches and parses the menu of each dining hall concurrently
+
+    :param dining_halls: list of DiningHall objects that have not been scraped yet
+    :param session: HTTP session shared by every request
+    """
+    def scrape(dining_hall):
+        dining_hall.fetch(session)
+        dining_hall.parse()
+
+    with ThreadPoolExecutor(max_workers=max(len(dining_halls), 1)) as executor:
+        # list() re-raises the first exception from any dining hall
+        list(executor.map(scrape, dining_halls))
+
+
 class Menu:
     """Represents the combined menu of all dining halls and interacts with database
 
@@ -163,17 +255,10 @@ class Menu:
             '''
             db_write(conn, add_total_menu_query, key, key)
 
-            # Insert all items to DailyMenu table
-            at_y = False
-            at_south = False
-            at_251 = False
-
-            if 'Yahentamitsi' in self.total_menu[key].dining_halls:
-                at_y = True
-            if 'South' in self.total_menu[key].dining_halls:
-                at_south = True
-            if '251' in self.total_menu[key].dining_halls:
-                at_251 = True
+            # Insert all items to DailyMenu table, with the bit of each dining hall serving them set
+            dining_halls = 0
+            for name in self.total_menu[key].dining_halls:
+                dining_halls |= 1 << DINING_HALL_BITS[name]
 
             # Get foreign key to menu item
             get_menu_item_query = '''
@@ -187,12 +272,14 @@ class Menu:
 
             add_daily_menu_query = '''
                 INSERT INTO accounts_dailymenu 
-                    (menu_item_id, date, yahentamitsi_dining_hall, south_dining_hall, two_fifty_one_dining_hall)
+                    (menu_item_id, date, dining_halls)
                 VALUES
-                    (%s, %s, %s, %s, %s)
+                    (%s, %s, %s)
+                ON CONFLICT (menu_item_id, date) DO UPDATE
+                SET dining_halls = accounts_dailymenu.dining_halls | EXCLUDED.dining_halls
             '''
 
-            db_write(conn, add_daily_menu_query, menu_item_id, date.today(), at_y, at_south, at_251)
+            db_write(conn, add_daily_menu_query, menu_item_id, date.today(), dining_halls)
 
 
     def __str__(self):
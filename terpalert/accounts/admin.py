@@ -1,9 +1,16 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Profile, Alert, Menu, DailyMenu, ProfileAdmin
+from .models import (Profile, Alert, KeywordAlert, Menu, DailyMenu, DiningHall, MenuPage, MenuSnapshot, SentAlert,
+                     AlertRun, ProfileAdmin)
 from .forms import ProfileCreationForm, ProfileChangeForm
 
 admin.site.register(Profile, ProfileAdmin)
 admin.site.register(Alert)
+admin.site.register(KeywordAlert)
 admin.site.register(Menu)
 admin.site.register(DailyMenu)
+admin.site.register(MenuPage)
+admin.site.register(MenuSnapshot)
+admin.site.register(DiningHall)
+admin.site.register(SentAlert)
+admin.site.register(AlertRun)
@@ -0,0 +1,31 @@
+import os
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from accounts.partitions import add_months, archive_partition, get_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    """
+    Move the monthly DailyMenu partitions older than the retention period out of the database, into gzipped CSV
+    exports (one per month) that can be loaded back with COPY
+    """
+    help = "Detach the DailyMenu partitions of old months and export them to compressed CSV files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="directory to write the exports to")
+        parser.add_argument('--keep-months', type=int, default=12,
+                            help="months to keep in the database, besides the current one")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("The DailyMenu table is not partitioned, which requires PostgreSQL")
+        if options['keep_months'] < 0:
+            raise CommandError("--keep-months can't be negative")
+
+        os.makedirs(options['directory'], exist_ok=True)
+
+        oldest_kept = add_months(date.today().replace(day=1), -options['keep_months'])
+        for month in get_partitions():
+            if month < oldest_kept:
+                path = archive_partition(month, options['directory'])
+                self.stdout.write(f"Archived {month:%Y-%m} to {path}")
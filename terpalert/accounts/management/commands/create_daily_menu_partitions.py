@@ -0,0 +1,24 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from accounts.partitions import add_months, create_partition, is_partitioned, partition_name
+
+
+class Command(BaseCommand):
+    """
+    Create the monthly DailyMenu partitions of the current and coming months, run e.g. daily from cron
+    Dates without a partition are stored in the default partition, so a missed run only costs partition pruning
+    """
+    help = "Create the monthly partitions of the DailyMenu table for the current and coming months"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=3, help="months ahead of the current one to create")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("The DailyMenu table is not partitioned, which requires PostgreSQL")
+
+        this_month = date.today().replace(day=1)
+        for offset in range(options['months'] + 1):
+            month = add_months(this_month, offset)
+            if create_partition(month):
+                self.stdout.write(f"Created {partition_name(month)}")
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.13 on 2026-10-18 09:52
+
+import datetime
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_remove_profile_phone_profile_receive_email_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_num', models.IntegerField()),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('date_fetched', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='menupage',
+            constraint=models.UniqueConstraint(fields=('location_num', 'date'), name='unique_menu_page_per_day'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_menupage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_num', models.IntegerField()),
+                ('date', models.DateField()),
+                ('date_fetched', models.DateTimeField(default=django.utils.timezone.now)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('page', models.BinaryField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['location_num', 'date'], name='menu_snapshot_location_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:04
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Dining halls scraped before the registry existed, with the bit and boolean column of each
+DINING_HALLS = [
+    ('Yahentamitsi', 19, 0, 'yahentamitsi_dining_hall'),
+    ('South', 16, 1, 'south_dining_hall'),
+    ('251', 51, 2, 'two_fifty_one_dining_hall'),
+]
+
+
+def seed_dining_halls(apps, schema_editor):
+    """
+    Register the existing dining halls and set the bitmask of existing Daily Menu rows from their booleans
+    """
+    DiningHall = apps.get_model('accounts', 'DiningHall')
+    DailyMenu = apps.get_model('accounts', 'DailyMenu')
+
+    for name, location_num, bit, column in DINING_HALLS:
+        DiningHall.objects.create(name=name, location_num=location_num, bit=bit)
+        DailyMenu.objects.filter(**{column: True}).update(dining_halls=F('dining_halls') + (1 << bit))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_menusnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiningHall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('location_num', models.IntegerField(unique=True)),
+                ('bit', models.PositiveSmallIntegerField(blank=True, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['bit'],
+            },
+        ),
+        migrations.AddField(
+            model_name='dailymenu',
+            name='dining_halls',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_dining_halls, migrations.RunPython.noop),
+    ]
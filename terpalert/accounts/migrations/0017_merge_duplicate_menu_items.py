@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-18 11:20
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def merge_duplicate_menu_items(apps, schema_editor):
+    """
+    Point alerts and Daily Menu rows of duplicated items at the first copy, then delete the other copies
+    """
+    Menu = apps.get_model('accounts', 'Menu')
+    Alert = apps.get_model('accounts', 'Alert')
+    DailyMenu = apps.get_model('accounts', 'DailyMenu')
+
+    duplicates = Menu.objects.values('item').annotate(first_id=Min('id')).filter(item__in=(
+        Menu.objects.values('item').annotate(copies=models.Count('id')).filter(copies__gt=1).values('item')
+    ))
+
+    for duplicate in duplicates:
+        copies = Menu.objects.filter(item=duplicate['item']).exclude(id=duplicate['first_id'])
+        Alert.objects.filter(menu_item__in=copies).update(menu_item_id=duplicate['first_id'])
+        DailyMenu.objects.filter(menu_item__in=copies).update(menu_item_id=duplicate['first_id'])
+        copies.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_dininghall_dailymenu_dining_halls'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_menu_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_merge_duplicate_menu_items'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menu',
+            name='item',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
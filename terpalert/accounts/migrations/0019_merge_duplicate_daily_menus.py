@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+def merge_duplicate_daily_menus(apps, schema_editor):
+    """
+    Collapse Daily Menu rows stored more than once for an item and date (e.g. by a retried scrape) into the first
+    row, which is marked with every dining hall any of the copies had
+    """
+    DailyMenu = apps.get_model('accounts', 'DailyMenu')
+
+    duplicates = (DailyMenu.objects.values('menu_item_id', 'date')
+                  .annotate(first_id=models.Min('id'), copies=models.Count('id'))
+                  .filter(copies__gt=1))
+
+    for duplicate in duplicates.iterator():
+        rows = list(DailyMenu.objects.filter(menu_item_id=duplicate['menu_item_id'], date=duplicate['date']))
+        first = next(row for row in rows if row.id == duplicate['first_id'])
+
+        for row in rows:
+            first.yahentamitsi_dining_hall |= row.yahentamitsi_dining_hall
+            first.south_dining_hall |= row.south_dining_hall
+            first.two_fifty_one_dining_hall |= row.two_fifty_one_dining_hall
+            first.dining_halls |= row.dining_halls
+
+        first.save()
+        DailyMenu.objects.filter(id__in=[row.id for row in rows if row.id != first.id]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_alter_menu_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_daily_menus, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_merge_duplicate_daily_menus'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='dailymenu',
+            constraint=models.UniqueConstraint(fields=('menu_item', 'date'), name='unique_daily_menu_item'),
+        ),
+    ]
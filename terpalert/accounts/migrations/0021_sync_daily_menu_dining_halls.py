@@ -0,0 +1,43 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:18
+
+from django.db import migrations
+from django.db.models import F
+
+# Boolean column of each dining hall that had one, with its bit in DailyMenu.dining_halls
+DINING_HALL_COLUMNS = [
+    ('yahentamitsi_dining_hall', 0),
+    ('south_dining_hall', 1),
+    ('two_fifty_one_dining_hall', 2),
+]
+
+
+def booleans_to_bitmask(apps, schema_editor):
+    """
+    Set the bit of every dining hall whose boolean is set, for rows written without the bitmask
+    (e.g. by the old scraper) before the boolean columns are removed
+    """
+    DailyMenu = apps.get_model('accounts', 'DailyMenu')
+
+    for column, bit in DINING_HALL_COLUMNS:
+        DailyMenu.objects.filter(**{column: True}).update(dining_halls=F('dining_halls').bitor(1 << bit))
+
+
+def bitmask_to_booleans(apps, schema_editor):
+    """
+    Restore the boolean columns from the bitmask
+    """
+    DailyMenu = apps.get_model('accounts', 'DailyMenu')
+
+    for column, bit in DINING_HALL_COLUMNS:
+        DailyMenu.objects.filter(dining_halls=F('dining_halls').bitor(1 << bit)).update(**{column: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_dailymenu_unique_daily_menu_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(booleans_to_bitmask, bitmask_to_booleans),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_sync_daily_menu_dining_halls'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dailymenu',
+            name='south_dining_hall',
+        ),
+        migrations.RemoveField(
+            model_name='dailymenu',
+            name='two_fifty_one_dining_hall',
+        ),
+        migrations.RemoveField(
+            model_name='dailymenu',
+            name='yahentamitsi_dining_hall',
+        ),
+        migrations.AddIndex(
+            model_name='dailymenu',
+            index=models.Index(fields=['date'], name='daily_menu_date'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:40
+
+from datetime import date
+from django.db import migrations
+
+MONTHS_AHEAD = 3  # partitions created past the current month, later ones by create_daily_menu_partitions
+
+
+def add_months(month, months):
+    """
+    First day of the month a number of months after month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_daily_menu(apps, schema_editor):
+    """
+    Rebuild accounts_dailymenu as a table range partitioned by month on date, so reads of a day only scan the
+    month's partition and old months can be detached whole
+    A partitioned table's unique constraints must include date, so the primary key becomes (id, date), and ids
+    come from a sequence since PostgreSQL before 17 has no identity columns on partitioned tables
+    The model is unchanged, so other databases (e.g. SQLite in tests) keep a plain table
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT min(date), coalesce(max(id), 0) FROM accounts_dailymenu")
+        first_date, last_id = cursor.fetchone()
+
+        cursor.execute("ALTER TABLE accounts_dailymenu RENAME TO accounts_dailymenu_unpartitioned")
+        cursor.execute("ALTER TABLE accounts_dailymenu_unpartitioned ALTER COLUMN id DROP IDENTITY")
+        cursor.execute('''
+            CREATE TABLE accounts_dailymenu (LIKE accounts_dailymenu_unpartitioned)
+            PARTITION BY RANGE (date)
+        ''')
+        cursor.execute("CREATE SEQUENCE accounts_dailymenu_id_seq OWNED BY accounts_dailymenu.id")
+        cursor.execute("SELECT setval('accounts_dailymenu_id_seq', %s, %s)", [max(last_id, 1), last_id > 0])
+        cursor.execute('''
+            ALTER TABLE accounts_dailymenu
+            ALTER COLUMN id SET DEFAULT nextval('accounts_dailymenu_id_seq')
+        ''')
+
+        cursor.execute("CREATE TABLE accounts_dailymenu_default PARTITION OF accounts_dailymenu DEFAULT")
+        this_month = date.today().replace(day=1)
+        month = min(first_date or this_month, this_month).replace(day=1)
+        while month <= add_months(this_month, MONTHS_AHEAD):
+            cursor.execute(f'''
+                CREATE TABLE accounts_dailymenu_y{month.year}m{month.month:02d}
+                PARTITION OF accounts_dailymenu FOR VALUES FROM (%s) TO (%s)
+            ''', [month, add_months(month, 1)])
+            month = add_months(month, 1)
+
+        cursor.execute("INSERT INTO accounts_dailymenu SELECT * FROM accounts_dailymenu_unpartitioned")
+        cursor.execute("DROP TABLE accounts_dailymenu_unpartitioned")
+
+        # Same names as the constraints and indexes of the plain table, so later migrations can find them
+        cursor.execute("ALTER TABLE accounts_dailymenu ADD CONSTRAINT accounts_dailymenu_pkey PRIMARY KEY (id, date)")
+        cursor.execute('''
+            ALTER TABLE accounts_dailymenu
+            ADD CONSTRAINT unique_daily_menu_item UNIQUE (menu_item_id, date)
+        ''')
+        cursor.execute("CREATE INDEX daily_menu_date ON accounts_dailymenu (date)")
+        cursor.execute("CREATE INDEX accounts_dailymenu_menu_item_id_0c4c7df7 ON accounts_dailymenu (menu_item_id)")
+        cursor.execute('''
+            ALTER TABLE accounts_dailymenu
+            ADD CONSTRAINT accounts_dailymenu_menu_item_id_0c4c7df7_fk_accounts_menu_id
+            FOREIGN KEY (menu_item_id) REFERENCES accounts_menu (id) DEFERRABLE INITIALLY DEFERRED
+        ''')
+        cursor.execute("ANALYZE accounts_dailymenu")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_remove_dailymenu_hall_booleans'),
+    ]
+
+    operations = [
+        # Not reversed: the partitioned table has the same columns, so earlier migrations run on it unchanged
+        migrations.RunPython(partition_daily_menu, migrations.RunPython.noop),
+    ]
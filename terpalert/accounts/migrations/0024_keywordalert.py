@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_partition_daily_menu'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(max_length=255)),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='keywordalert',
+            constraint=models.UniqueConstraint(fields=('user', 'keyword'), name='unique_keyword_per_user'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.13 on 2026-10-18 10:35
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_keywordalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('items', models.JSONField(default=list)),
+                ('last_alert_id', models.BigIntegerField(default=0)),
+                ('last_keyword_id', models.BigIntegerField(default=0)),
+                ('date_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SentAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('date_sent', models.DateTimeField(default=django.utils.timezone.now)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.menu')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='sent_alert_date')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sentalert',
+            constraint=models.UniqueConstraint(fields=('user', 'menu_item', 'date'), name='unique_sent_alert'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.conf import settings
 from django.utils import timezone
 from datetime import date
+import re
 from .fields import LowercaseEmailField
 from django.contrib.admin import ModelAdmin
 
@@ -82,7 +83,7 @@ class Menu(models.Model):
     """
     Stores all menu items that be chosen as a keyword
     """
-    item = models.CharField(max_length=255)
+    item = models.CharField(max_length=255, unique=True)
 
     def __str__(self):
         return self.item
@@ -100,15 +101,219 @@ class Alert(models.Model):
         return f"{self.menu_item.item} - {self.user.email}"
 
 
+class KeywordAlert(models.Model):
+    """
+    Tracks a free-text keyword associated with a user, e.g. "chicken", alerting them of every menu item containing
+    it as a whole word
+    """
+    WORD_CHARACTERS = re.compile(r'[a-z0-9]')  # letters and digits, anything else separates words
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    keyword = models.CharField(max_length=255)
+    date_created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'keyword'], name='unique_keyword_per_user'),
+        ]
+
+    @staticmethod
+    def normalize(text):
+        """
+        Lowercase text and collapse its whitespace, the form keywords are stored and matched in
+        """
+        return ' '.join(text.lower().split())
+
+    def matches(self, item):
+        """
+        Check if the keyword appears in a menu item as a whole word (or words)
+        """
+        text = self.normalize(item)
+        start = text.find(self.keyword)
+        while start != -1:
+            end = start + len(self.keyword)
+            if ((start == 0 or not self.WORD_CHARACTERS.match(text[start - 1]))
+                    and (end == len(text) or not self.WORD_CHARACTERS.match(text[end]))):
+                return True
+            start = text.find(self.keyword, start + 1)
+        return False
+
+    def save(self, *args, **kwargs):
+        self.keyword = self.normalize(self.keyword)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.keyword} - {self.user.email}"
+
+
+class DiningHallQuerySet(models.QuerySet):
+    """
+    Dining halls, deleted one at a time so every deletion is checked by DiningHall.delete()
+    """
+    def delete(self):
+        deleted = 0
+        for dining_hall in self:
+            deleted += dining_hall.delete()[0]
+        return deleted, {DiningHall._meta.label: deleted}
+
+
+class DiningHallManager(models.Manager.from_queryset(DiningHallQuerySet)):
+    """
+    Manager of the dining hall registry, which also decodes DailyMenu.dining_halls
+    """
+    def decode(self, mask, dining_halls=None):
+        """
+        Decode a DailyMenu.dining_halls bitmask into the dining halls it marks, in bit order
+        Pass the registry as dining_halls when decoding many rows, to read it only once
+        """
+        if dining_halls is None:
+            dining_halls = self.all()
+        return [dining_hall for dining_hall in dining_halls if mask & (1 << dining_hall.bit)]
+
+
+class DiningHall(models.Model):
+    """
+    Registry of the dining halls whose menus are scraped
+    Each dining hall owns one bit of DailyMenu.dining_halls, so adding one needs no schema change
+    A dining hall that is no longer scraped is retired with is_active rather than deleted, so its bit is never given
+    to a new dining hall while menu rows still mark it
+    """
+    MAX_DINING_HALLS = 63  # bits available in a signed BigIntegerField
+
+    name = models.CharField(max_length=255, unique=True)
+    location_num = models.IntegerField(unique=True)
+    bit = models.PositiveSmallIntegerField(unique=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    objects = DiningHallManager()
+
+    class Meta:
+        ordering = ['bit']
+
+    def save(self, *args, **kwargs):
+        """
+        Assign the next free bit to a new dining hall
+        """
+        if self.bit is None:
+            last = DiningHall.objects.aggregate(models.Max('bit'))['bit__max']
+            self.bit = 0 if last is None else last + 1
+
+        if self.bit >= self.MAX_DINING_HALLS:
+            raise ValueError(f"Dining halls are limited to {self.MAX_DINING_HALLS}")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete a dining hall only if no menu row marks its bit, since the next dining hall added could reuse it
+        """
+        served = DailyMenu.objects.alias(served=models.F('dining_halls').bitand(1 << self.bit)).filter(served__gt=0)
+        if served.exists():
+            raise models.ProtectedError(f"{self.name} is on stored menus, set is_active to retire it instead",
+                                        set(served[:10]))
+        return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
 class DailyMenu(models.Model):
     """
     Stores dining hall menu for each day
+    The dining halls serving an item are one bitmask, so a row stays the same size as dining halls are added
     """
     menu_item = models.ForeignKey(Menu, on_delete=models.CASCADE)
     date = models.DateField(default=date.today)
-    yahentamitsi_dining_hall = models.BooleanField(default=False)
-    south_dining_hall = models.BooleanField(default=False)
-    two_fifty_one_dining_hall = models.BooleanField(default=False)
+    dining_halls = models.BigIntegerField(default=0)  # bitmask of DiningHall.bit serving the item
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['menu_item', 'date'], name='unique_daily_menu_item'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_menu_date'),  # the scraper reads and writes a day at a time
+        ]
+
+    def get_dining_hall_names(self, dining_halls=None):
+        """
+        Names of the dining halls serving the item, e.g. ['Yahentamitsi', 'South']
+        """
+        return [dining_hall.name for dining_hall in DiningHall.objects.decode(self.dining_halls, dining_halls)]
 
     def __str__(self):
         return f"{self.date}: {self.menu_item}"
+
+
+class SentAlert(models.Model):
+    """
+    Records a menu item a user was sent an alert for on a date, by an alert or a keyword, so later runs of the
+    scraper on that date don't send it again
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    menu_item = models.ForeignKey(Menu, on_delete=models.CASCADE)
+    date = models.DateField(default=date.today)
+    date_sent = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'menu_item', 'date'], name='unique_sent_alert'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='sent_alert_date'),  # old days are deleted by the scraper
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.menu_item.item} - {self.user.email}"
+
+
+class AlertRun(models.Model):
+    """
+    Tracks what the scraper already computed alerts for on a date: the menu items, and the alerts and keywords
+    up to the highest id seen, so later runs only compute alerts for new items, alerts and keywords
+    """
+    date = models.DateField(unique=True)
+    items = models.JSONField(default=list)  # names of the menu items
+    last_alert_id = models.BigIntegerField(default=0)
+    last_keyword_id = models.BigIntegerField(default=0)
+    date_updated = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.date}: {len(self.items)} items"
+
+
+class MenuPage(models.Model):
+    """
+    Stores the validators of each dining hall's menu page for a day, so the scraper can skip unchanged pages
+    """
+    location_num = models.IntegerField()
+    date = models.DateField(default=date.today)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64)
+    date_fetched = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location_num', 'date'], name='unique_menu_page_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: location {self.location_num}"
+
+
+class MenuSnapshot(models.Model):
+    """
+    Append-only archive of fetched menu pages, gzip compressed, so menus can be re-parsed without scraping
+    """
+    location_num = models.IntegerField()
+    date = models.DateField()
+    date_fetched = models.DateTimeField(default=timezone.now)
+    content_hash = models.CharField(max_length=64)
+    page = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['location_num', 'date'], name='menu_snapshot_location_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: location {self.location_num} ({self.date_fetched})"
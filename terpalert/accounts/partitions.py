@@ -0,0 +1,140 @@
+import gzip
+import os
+import re
+from datetime import date
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+# DailyMenu is range partitioned by month on PostgreSQL (see migration 0023), one table per month
+DAILY_MENU_TABLE = 'accounts_dailymenu'
+DEFAULT_PARTITION = 'accounts_dailymenu_default'  # catches dates no monthly partition covers yet
+PARTITION_NAME = re.compile(r'^accounts_dailymenu_y(\d{4})m(\d{2})$')
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    :param month: first day of a month
+    :param months: number of months to move by, negative to move back
+    :return: first day of the resulting month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """
+    :param month: first day of a month
+    :return: name of the month's partition, e.g. accounts_dailymenu_y2024m09
+    """
+    return f'{DAILY_MENU_TABLE}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned() -> bool:
+    """
+    :return: true if DailyMenu is a partitioned table, false on other databases (e.g. SQLite in tests)
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [DAILY_MENU_TABLE])
+        return cursor.fetchone() is not None
+
+
+def get_partitions() -> dict:
+    """
+    :return: dictionary mapping the first day of each month with a partition to the partition's name, in order
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('''
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+        ''', [DAILY_MENU_TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_partition(month: date) -> bool:
+    """
+    Create the partition of a month, moving in any of its rows that were stored in the default partition
+    :param month: first day of the month
+    :return: true if the partition was created, false if it already existed
+    """
+    name = partition_name(month)
+    if month in get_partitions():
+        return False
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # A partition can't be created while the default partition holds rows in its range, so they are moved
+        # to a new table first, which is then attached
+        cursor.execute(f'CREATE TABLE {name} (LIKE {DAILY_MENU_TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(f'''
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE date >= %s AND date < %s
+                RETURNING *
+            )
+            INSERT INTO {name}
+            SELECT * FROM moved
+        ''', [month, add_months(month, 1)])
+        cursor.execute(f'ALTER TABLE {DAILY_MENU_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+                       [month, add_months(month, 1)])
+    return True
+
+
+def archive_partition(month: date, directory: str) -> str:
+    """
+    Detach the partition of a month and export its rows, with their item names, to a gzipped CSV file
+    The partition is only dropped once the export is written, in the same transaction as the detach
+    :param month: first day of the month
+    :param directory: directory of the exports
+    :return: path of the export, e.g. daily_menu_2024-09.csv.gz
+    """
+    name = partition_name(month)
+    path = os.path.join(directory, f'daily_menu_{month:%Y-%m}.csv.gz')
+    temp_path = path + '.tmp'
+
+    export_query = f'''
+        COPY (
+            SELECT {name}.id, menu_item_id, accounts_menu.item, date, dining_halls
+            FROM {name}
+            JOIN accounts_menu ON accounts_menu.id = {name}.menu_item_id
+            ORDER BY date, accounts_menu.item
+        ) TO STDOUT WITH (FORMAT csv, HEADER)
+    '''
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {DAILY_MENU_TABLE} DETACH PARTITION {name}')
+        try:
+            with gzip.open(temp_path, 'wb') as file:
+                _copy_to(cursor, export_query, file)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        cursor.execute(f'DROP TABLE {name}')
+    return path
+
+
+def _copy_to(cursor, query: str, file):
+    """
+    Write the output of a COPY ... TO STDOUT query to a file, with the COPY API of the installed driver
+    :param cursor: Django database cursor
+    :param query: COPY ... TO STDOUT query
+    :param file: binary file to write to
+    """
+    if is_psycopg3:
+        with cursor.copy(query) as copy:
+            for data in copy:
+                file.write(data)
+    else:
+        cursor.copy_expert(query, file)
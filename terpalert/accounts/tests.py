@@ -1,9 +1,18 @@
+import sys
+import tempfile
+from pathlib import Path
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import ProtectedError
 from .forms import ProfileCreationForm
+from .models import DailyMenu, DiningHall, KeywordAlert, Menu
 from django import forms
 
+# The scraper matches keywords in its own function package, imported from its directory to compare it with the model
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'scrape-menu' / 'packages' / 'scrape' / 'get_menu'))
+from keywords import KeywordAutomaton, KeywordMatcher, normalize  # noqa: E402
+
 
 # Create your tests here.
 class ProfileManagerTests(TestCase):
@@ -124,3 +133,155 @@ class ProfileCreationFormTests(TestCase):
 
         form2 = ProfileCreationForm(data=form_data)
         self.assertFalse(form2.is_valid())
+
+
+class DailyMenuDiningHallsTests(TestCase):
+    """
+    Tests for decoding the dining halls bitmask of DailyMenu
+    """
+
+    def test_get_dining_hall_names(self):
+        """
+        Test get_dining_hall_names(), making sure the dining halls are decoded in bit order
+        """
+        menu_item = Menu.objects.create(item='Pancakes')
+        daily_menu_item = DailyMenu.objects.create(menu_item=menu_item, dining_halls=0b101)
+        self.assertEqual(daily_menu_item.get_dining_hall_names(), ['Yahentamitsi', '251'])
+
+        daily_menu_item.dining_halls = 0
+        self.assertEqual(daily_menu_item.get_dining_hall_names(), [])
+
+    def test_decode_new_dining_hall(self):
+        """
+        Test that a newly registered dining hall gets the next bit and is decoded without schema changes
+        """
+        dining_hall = DiningHall.objects.create(name='Test Hall', location_num=99)
+        self.assertEqual(dining_hall.bit, 3)
+
+        dining_halls = list(DiningHall.objects.all())
+        decoded = DiningHall.objects.decode((1 << 3) | (1 << 1), dining_halls)
+        self.assertEqual([hall.name for hall in decoded], ['South', 'Test Hall'])
+
+    def test_delete_dining_hall_on_menu(self):
+        """
+        Test that a dining hall on a stored menu can't be deleted, so a new dining hall never takes over its bit
+        """
+        dining_hall = DiningHall.objects.create(name='Test Hall', location_num=99)
+        menu_item = Menu.objects.create(item='Pancakes')
+        DailyMenu.objects.create(menu_item=menu_item, dining_halls=1 << dining_hall.bit)
+
+        with self.assertRaises(ProtectedError):
+            dining_hall.delete()
+        with self.assertRaises(ProtectedError):
+            DiningHall.objects.filter(name='Test Hall').delete()
+        self.assertTrue(DiningHall.objects.filter(name='Test Hall').exists())
+
+        new_dining_hall = DiningHall.objects.create(name='New Hall', location_num=100)
+        self.assertEqual(new_dining_hall.bit, dining_hall.bit + 1)
+
+    def test_delete_dining_hall_off_menu(self):
+        """
+        Test that a dining hall on no stored menu can be deleted
+        """
+        dining_hall = DiningHall.objects.create(name='Test Hall', location_num=99)
+        Menu.objects.create(item='Pancakes')
+
+        self.assertEqual(DiningHall.objects.filter(pk=dining_hall.pk).delete()[0], 1)
+        self.assertFalse(DiningHall.objects.filter(name='Test Hall').exists())
+
+
+class KeywordAlertTests(TestCase):
+    """
+    Tests for free-text keyword alerts
+    """
+
+    def test_normalize_on_save(self):
+        """
+        Test that keywords are stored lowercase with their whitespace collapsed
+        """
+        user = get_user_model().objects.create_user(email='test@test.com', password='foo')
+        keyword = KeywordAlert.objects.create(user=user, keyword='  Grilled   CHICKEN ')
+        self.assertEqual(keyword.keyword, 'grilled chicken')
+
+    def test_matches(self):
+        """
+        Test that keywords only match menu items containing them as whole words
+        """
+        keyword = KeywordAlert(keyword='ham')
+        self.assertTrue(keyword.matches('Ham & Cheese Croissant'))
+        self.assertTrue(keyword.matches('Honey Glazed Ham'))
+        self.assertFalse(keyword.matches('Graham Crackers'))
+        self.assertFalse(keyword.matches('Hamburger'))
+
+        keyword = KeywordAlert(keyword='grilled chicken')
+        self.assertTrue(keyword.matches('BBQ Grilled  Chicken Sandwich'))
+        self.assertFalse(keyword.matches('Grilled Chickenless Patty'))
+
+
+class ScraperKeywordMatchTests(TestCase):
+    """
+    Tests that the scraper's keyword automaton alerts for the same menu items as KeywordAlert.matches()
+    """
+    KEYWORDS = ['ham', 'ham & cheese', 'chicken', 'grilled chicken', 'chick', 'bbq', 'mac and cheese', 'cheese',
+                'tofu', '2%', 'egg']
+    ITEMS = ['Ham & Cheese Croissant', 'Honey Glazed Ham', 'Graham Crackers', 'Hamburger', 'BBQ Grilled  Chicken',
+             'Grilled Chickenless Patty', 'Chick-fil-A Sandwich', 'Chickpea Curry', 'Mac and Cheese Bites',
+             'Cheesecake', 'Spicy Tofu Stir Fry', '2% Milk', '12% Cream', 'Scrambled Eggs', 'Egg & Cheese Bagel',
+             'EGG', 'Chicken/Ham Wrap', 'Pulled Pork (BBQ)', '']
+
+    def expected_matches(self, keywords):
+        """
+        Matches of each keyword found by KeywordAlert.matches(), in the form KeywordMatcher.match() returns them
+        """
+        expected = {}
+        for keyword in keywords:
+            alert = KeywordAlert(keyword=normalize(keyword))
+            items = [item for item in self.ITEMS if alert.matches(item)]
+            if items:
+                expected[alert.keyword] = items
+        return expected
+
+    def test_automaton_matches_model(self):
+        """
+        Test that the automaton finds the same keywords in each item as KeywordAlert.matches()
+        """
+        automaton = KeywordAutomaton(self.KEYWORDS)
+        for item in self.ITEMS:
+            expected = {keyword for keyword in self.KEYWORDS if KeywordAlert(keyword=keyword).matches(item)}
+            self.assertEqual(automaton.find(normalize(item)), expected, item)
+
+    def test_remove_keyword(self):
+        """
+        Test that removing keywords, enough to compact the trie, leaves the same matches as KeywordAlert.matches()
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            matcher = KeywordMatcher(str(Path(directory) / 'keywords.json'))
+            matcher.update('test', [len(self.KEYWORDS), 1], self.KEYWORDS)
+            self.assertEqual(matcher.match(self.ITEMS), self.expected_matches(self.KEYWORDS))
+
+            keywords = list(self.KEYWORDS)
+            for removed in ['ham', 'chicken', 'cheese', 'bbq', 'tofu', '2%', 'egg']:
+                keywords.remove(removed)
+                matcher.update('test', [len(keywords), 1], keywords)
+                self.assertEqual(matcher.match(self.ITEMS), self.expected_matches(keywords), removed)
+
+    def test_reload_snapshot(self):
+        """
+        Test that a matcher loaded from the snapshot of another, after a keyword was removed and one added, finds
+        the same matches as KeywordAlert.matches()
+        """
+        keywords = [keyword for keyword in self.KEYWORDS if keyword != 'chicken'] + ['pork']
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'keywords.json')
+            KeywordMatcher(path).update('test', [len(self.KEYWORDS), 1], self.KEYWORDS)
+            KeywordMatcher(path).update('test', [len(keywords), 2], keywords)
+
+            matcher = KeywordMatcher(path)
+            self.assertTrue(matcher.load('test', [len(keywords), 2]))
+            self.assertEqual(matcher.match(self.ITEMS), self.expected_matches(keywords))
+
+            # A cold start on an outdated snapshot is brought up to date from it
+            matcher = KeywordMatcher(path)
+            self.assertFalse(matcher.load('test', [len(self.KEYWORDS), 3]))
+            matcher.update('test', [len(self.KEYWORDS), 3], self.KEYWORDS)
+            self.assertEqual(matcher.match(self.ITEMS), self.expected_matches(self.KEYWORDS))
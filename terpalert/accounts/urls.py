@@ -12,6 +12,9 @@ urlpatterns = [
     path('load-alerts/', views.load_alerts, name='load-alerts'),
     path('delete-alert/', views.delete_alert, name='delete-alert'),
     path('save-alert/', views.save_alert, name='save-alert'),
+    path('load-keywords/', views.load_keywords, name='load-keywords'),
+    path('delete-keyword/', views.delete_keyword, name='delete-keyword'),
+    path('save-keyword/', views.save_keyword, name='save-keyword'),
     path('load-menu/', views.load_menu, name='load-menu'),
     path('set-receive-alerts/', views.set_receive_alerts, name='set-receive-alerts'),
     path('delete-account/', views.delete_account, name='delete-account'),
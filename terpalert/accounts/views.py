@@ -3,7 +3,7 @@ from django.contrib.auth import login, authenticate, logout
 from django.http import JsonResponse
 from .forms import ProfileCreationForm
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Alert, Menu, DailyMenu, Profile
+from .models import Alert, KeywordAlert, Menu, DailyMenu, DiningHall, Profile
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.db.models import Case, Value, When, CharField
@@ -104,22 +104,28 @@ def account(request):
 
     # Find today's alerts (if any) for user
     alerts = Alert.objects.filter(user__email__exact=request.user.email).order_by('menu_item')
+    dining_halls = list(DiningHall.objects.all())  # decodes every alert's dining halls with one query
     for alert in alerts:  # All the user's alerts
-        daily_menu_item = DailyMenu.objects.filter(menu_item_id=alert.menu_item.id, date=date.today())
+        daily_menu_item = DailyMenu.objects.filter(menu_item_id=alert.menu_item.id, date=date.today()).first()
 
-        if daily_menu_item.exists():  # Alert is in the daily menu for today's date
+        if daily_menu_item is not None:  # Alert is in the daily menu for today's date
             context['notifications'] = True
 
             # Add dining halls the alert is applicable to
-            dining_halls = []
-            if daily_menu_item[0].yahentamitsi_dining_hall:
-                dining_halls.append('Yahentamitsi')
-            if daily_menu_item[0].south_dining_hall:
-                dining_halls.append('South')
-            if daily_menu_item[0].two_fifty_one_dining_hall:
-                dining_halls.append('251')
-
-            context['data'].append([alert.menu_item.item, ', '.join(dining_halls)])
+            dining_hall_names = daily_menu_item.get_dining_hall_names(dining_halls)
+            context['data'].append([alert.menu_item.item, ', '.join(dining_hall_names)])
+
+    # Today's items containing one of the user's keywords, unless already found by an alert
+    keywords = list(KeywordAlert.objects.filter(user_id=request.user.id))
+    if keywords:
+        alerted_items = {item for item, _ in context['data']}
+        daily_menu = DailyMenu.objects.filter(date=date.today()).select_related('menu_item').order_by('menu_item')
+        for daily_menu_item in daily_menu:
+            item = daily_menu_item.menu_item.item
+            if item not in alerted_items and any(keyword.matches(item) for keyword in keywords):
+                context['notifications'] = True
+                dining_hall_names = daily_menu_item.get_dining_hall_names(dining_halls)
+                context['data'].append([item, ', '.join(dining_hall_names)])
 
     return render(request, 'home.html', context)
 
@@ -199,6 +205,66 @@ def save_alert(request):
         return redirect('account')  # Redirect any attempts to access this page
 
 
+@login_required
+def load_keywords(request):
+    """
+    Handle the Ajax request to retrieve the keyword alerts for the current user
+    All keywords for that user are returned in order of date created, most recent first
+
+    :return: JsonResponse containing a list with fields "id" and "keyword"
+    """
+    keywords = KeywordAlert.objects.filter(user_id=request.user.id).order_by('-date_created', 'id')
+    data = [{'id': keyword.id, 'keyword': keyword.keyword} for keyword in keywords]
+    return JsonResponse({'data': data})
+
+
+@login_required
+def delete_keyword(request):
+    """
+    Deletes the user's keyword given by Ajax request
+
+    :return: JsonResponse containing the deleted object
+    """
+    if request.method == 'POST':
+        keyword_to_delete = KeywordAlert.objects.get(pk=request.POST['keyword-id'], user_id=request.user.id)
+        data = {'data': keyword_to_delete.delete()}
+        return JsonResponse(data)
+    else:
+        return redirect('home')  # Redirect any attempts to access this page
+
+
+@login_required
+def save_keyword(request):
+    """
+    Saves the keyword given by Ajax request, alerting the user of every menu item containing it
+    Keyword won't save if it is empty or if it is already a keyword for the user
+
+    :return: JsonResponse containing the keyword and its id. If saving was unsuccessful, message is returned
+    """
+    if request.method == 'POST':
+        keyword = KeywordAlert.normalize(request.POST['keyword'])
+        data = {}
+
+        if not keyword:
+            data['success'] = False
+            data['message'] = 'Keywords can not be empty!'
+        elif len(keyword) > KeywordAlert._meta.get_field('keyword').max_length:
+            data['success'] = False
+            data['message'] = 'This keyword is too long!'
+        elif KeywordAlert.objects.filter(keyword=keyword, user_id=request.user.id).exists():
+            data['success'] = False
+            data['message'] = 'This keyword has already been added!'
+        else:
+            saved_keyword = KeywordAlert.objects.create(keyword=keyword, user_id=request.user.id)
+            data['success'] = True
+            data['id'] = saved_keyword.id
+            data['keyword'] = saved_keyword.keyword
+
+        return JsonResponse(data)
+    else:
+        return redirect('account')  # Redirect any attempts to access this page
+
+
 def load_menu(request):
     """
     Handle the Ajax request to retrieve search results for autocomplete
@@ -21,22 +21,14 @@ def check_for_alert(request):
         item = request.GET['item']
 
         menu_item = Menu.objects.get(item=item)  # Get Menu object for that item
-        daily_menu_item = DailyMenu.objects.filter(menu_item_id=menu_item.id, date=date.today())
+        daily_menu_item = DailyMenu.objects.filter(menu_item_id=menu_item.id, date=date.today()).first()
 
-        if daily_menu_item.exists():
+        if daily_menu_item is not None:
             # Item is being served today
             data = {'found': True, 'item': item}
 
             # Add dining halls the item is applicable to
-            dining_halls = []
-            if daily_menu_item[0].yahentamitsi_dining_hall:
-                dining_halls.append('Yahentamitsi')
-            if daily_menu_item[0].south_dining_hall:
-                dining_halls.append('South')
-            if daily_menu_item[0].two_fifty_one_dining_hall:
-                dining_halls.append('251')
-
-            data['dining_halls'] = ', '.join(dining_halls)
+            data['dining_halls'] = ', '.join(daily_menu_item.get_dining_hall_names())
         else:
             # Item isn't being served today
             data = {'found': False, 'item': item}
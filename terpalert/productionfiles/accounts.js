@@ -74,6 +74,47 @@ function getAlerts() {
                     </tr>
                 `
             });
+            getKeywords();
+        },
+        error: function (error) {
+            alert('Something went wrong, please try again later');
+        }
+    })
+}
+
+/**
+ * Send an Ajax request to retrieve the user's keyword alerts,
+ * then display each one in a table row below the menu item alerts
+ */
+function getKeywords() {
+    $.ajax({
+        type: 'GET',
+        url: '/accounts/load-keywords/',
+        success: function (response) {
+            const data = response.data;
+
+            // Keywords are typed freely by the user, so they are only ever set as text, never parsed as HTML
+            data.forEach(keyword => {
+                const row = alertTableBody.insertRow();
+                const cell1 = row.insertCell(0);
+                const cell2 = row.insertCell(1);
+
+                row.setAttribute('data-keyword-id', keyword.id);
+
+                // cell1 contains the keyword
+                cell1.textContent = `Anything with "${keyword.keyword}"`;
+
+                // cell2 contains the delete button
+                const deleteButton = document.createElement('button');
+                deleteButton.type = 'button';
+                deleteButton.className = 'btn btn-outline-danger';
+                deleteButton.setAttribute('data-bs-toggle', 'modal');
+                deleteButton.setAttribute('data-bs-target', '#delete-modal');
+                deleteButton.setAttribute('data-bs-alert', keyword.keyword);
+                deleteButton.innerHTML = '<i class="bi bi-trash3-fill"></i>';
+                cell2.appendChild(deleteButton);
+                cell2.className = 'col-right';
+            });
         },
         error: function (error) {
             alert('Something went wrong, please try again later');
@@ -89,12 +130,15 @@ function deleteAlert(button) {
     const csrftoken = getCookie('csrftoken');
     const td = button.parentNode;
     const tr = td.parentNode;
+    const isKeyword = tr.hasAttribute('data-keyword-id');
 
     $.ajax({
         type: 'POST',
-        url: '/accounts/delete-alert/',
+        url: isKeyword ? '/accounts/delete-keyword/' : '/accounts/delete-alert/',
         headers: {'X-CSRFToken': csrftoken},
-        data: { // sends the id of the alert
+        data: isKeyword ? { // sends the id of the keyword or alert
+            'keyword-id': tr.getAttribute('data-keyword-id'),
+        } : {
             'alert-id': tr.getAttribute('data-alert-id'),
         },
         success: function (response) {
@@ -124,7 +168,7 @@ function addAlert(button) {
     // cell1 contains the input field for the new alert
     cell1.innerHTML = `
         <input type="text" class="form-control no-border shadow-none input-width" name="alert" id="alert-input" 
-        placeholder="Type here" required>
+        placeholder="Type a menu item, or a keyword and press Enter" required>
     `;
 
     // cell2 contains the cancel button
@@ -163,6 +207,14 @@ function addAlert(button) {
         delay: 200,
         minLength: 1,
     });
+
+    // Save what was typed as a keyword when Enter is pressed without picking a menu item
+    $('#alert-input').on('keydown', function (event) {
+        if (event.key === 'Enter' && !event.isDefaultPrevented()) {
+            $(this).autocomplete('close');
+            saveKeyword();
+        }
+    });
 }
 
 /**
@@ -220,6 +272,38 @@ function saveAlert() {
     });
 }
 
+/**
+ * Sends an Ajax request to save the keyword entered by the user,
+ * alerting them of every menu item containing it
+ */
+function saveKeyword() {
+    const input = $('#alert-input').val(); // keyword entered by user
+    const csrftoken = getCookie('csrftoken');
+
+    $.ajax({
+        type: 'POST',
+        url: '/accounts/save-keyword/',
+        headers: {'X-CSRFToken': csrftoken},
+        data: { // sends the keyword
+            'keyword': input
+        },
+        success: function (response) {
+            if (response.success == true) {
+                // delete input row and reload the table with the new keyword
+                removeInputRow();
+                getAlerts();
+            } else {
+                // invalid submission occurred
+                $('#already-exists-modal').modal('show');
+                $('#alert-input').val('') // clear input field after invalid submission
+            }
+        },
+        error: function (error) {
+            alert('Something went wrong, please try again later');
+        }
+    });
+}
+
 /**
  * Removes alert input row and reenables the add alert button
  */